@@ -52,8 +52,8 @@ class AuthSystem:
 
         # Biometric capture
         if biometric_type == "face":
-            facial.capture_and_save_face_samples(user_id, samples=5)
-            facial.train_lbph_recognizer()
+            _, sample_paths = facial.capture_and_save_face_samples(user_id, samples=5)
+            facial.train_lbph_recognizer(new_user_id=user_id, sample_paths=sample_paths)
 
         elif biometric_type == "fingerprint":
             fp_path = get_user_fingerprint_path(user_id)
@@ -3,6 +3,9 @@ import numpy as np
 from pathlib import Path
 from typing import Optional, Tuple, List, Generator
 import json
+import os
+import shutil
+from utils.camera_async import VideoCaptureThreading
 from utils.helpers import BIOMETRIC_DIR, LABEL_MAP_FILE
 
 # -----------------------------------------------------------
@@ -13,6 +16,16 @@ FACE_CASCADE = cv2.CascadeClassifier(FACE_CASCADE_PATH)
 
 FACE_SIZE = (200, 200)
 
+# Contrast equalisation applied to every face crop, once, at capture and at
+# prediction; stored samples are already normalised so training reads them as-is
+FACE_CLAHE = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
+# Present in a faces folder once its samples are equalised. Folders without it
+# hold raw samples from before capture-time CLAHE and are migrated once, by
+# the training worker only
+_CLAHE_MARKER = ".clahe"
+_gallery_equalised = False
+
 
 def _detect_face_gray(gray_img: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
     """
@@ -33,49 +46,144 @@ def _detect_face_gray(gray_img: np.ndarray) -> Optional[Tuple[int, int, int, int
     return faces[0]
 
 
+# -----------------------------------------------------------
+# Sample Migration
+# -----------------------------------------------------------
+def _model_marker(model_path: Path) -> Path:
+    # written beside a model trained on equalised samples; predict_face only
+    # equalises the probe when it is present
+    return model_path.with_suffix(".clahe")
+
+
+def _recover_user_migration(user_dir: Path):
+    """Finish or roll back a folder swap interrupted by a crash."""
+    faces_dir = user_dir / "faces"
+    staging = user_dir / "faces.clahe.tmp"
+    backup = user_dir / "faces.raw.bak"
+    if not faces_dir.exists() and (staging / _CLAHE_MARKER).exists():
+        # crashed between the two renames: the staged copy is complete
+        os.replace(staging, faces_dir)
+    if not faces_dir.exists() and backup.exists():
+        os.replace(backup, faces_dir)
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(backup, ignore_errors=True)
+
+
+def _equalise_user_samples(user_dir: Path) -> bool:
+    """
+    Equalise a user's raw samples once. Copies are written to a sibling
+    folder and swapped in, so originals are never rewritten in place and an
+    interrupted run is redone from the raw files.
+    Returns True if any stored sample changed.
+    """
+    _recover_user_migration(user_dir)
+    faces_dir = user_dir / "faces"
+    if not faces_dir.is_dir() or (faces_dir / _CLAHE_MARKER).exists():
+        return False
+    # empty folders belong to a registration in progress; capture marks them itself
+    if not any(faces_dir.glob("*.png")):
+        return False
+
+    staging = user_dir / "faces.clahe.tmp"
+    staging.mkdir()
+    rewritten = False
+    for src in faces_dir.iterdir():
+        img = cv2.imread(str(src), cv2.IMREAD_GRAYSCALE) if src.suffix == ".png" else None
+        if img is None:
+            shutil.copy2(src, staging / src.name)
+            continue
+        cv2.imwrite(str(staging / src.name), FACE_CLAHE.apply(img))
+        rewritten = True
+    (staging / _CLAHE_MARKER).touch()
+
+    backup = user_dir / "faces.raw.bak"
+    os.replace(faces_dir, backup)
+    os.replace(staging, faces_dir)
+    shutil.rmtree(backup, ignore_errors=True)
+    return rewritten
+
+
+def _equalise_gallery() -> bool:
+    """
+    Migrate every enrolled user's raw samples, once per process.
+    Returns True if any sample changed, meaning the model must be retrained.
+    """
+    global _gallery_equalised
+    if _gallery_equalised:
+        return False
+
+    rewritten = False
+    for user_folder in BIOMETRIC_DIR.iterdir():
+        if user_folder.is_dir() and _equalise_user_samples(user_folder):
+            rewritten = True
+    _gallery_equalised = True
+    return rewritten
+
+
+def migrate_face_gallery(model_path: Path = BIOMETRIC_DIR / "lbph_model.yml") -> bool:
+    """
+    Equalise pre-CLAHE galleries and retrain when needed. Meant to run on the
+    training worker, the only place samples are migrated.
+    """
+    migrated = _equalise_gallery()
+    stale_model = model_path.exists() and not _model_marker(model_path).exists()
+    if migrated or stale_model:
+        return train_lbph_recognizer(model_path)
+    return True
+
+
 # -----------------------------------------------------------
 # Automatic Face Capture (Used by Registration Progress Bar)
 # -----------------------------------------------------------
-def open_camera_and_capture(user_id: str, required_samples: int) -> Generator[int, None, None]:
+def open_camera_and_capture(user_id: str, required_samples: int) -> Generator[str, None, None]:
     """
-    Generator that automatically captures faces and yields progress events.
+    Generator that automatically captures faces and yields the path of
+    each saved sample as a progress event.
     """
     user_faces_dir = BIOMETRIC_DIR / user_id / "faces"
     user_faces_dir.mkdir(parents=True, exist_ok=True)
-
-    cam = cv2.VideoCapture(0)
+    if not (user_faces_dir / _CLAHE_MARKER).exists():
+        # samples written from here on are equalised; raw ones from an older
+        # capture are being replaced, so drop them instead of migrating
+        for old in user_faces_dir.glob("*.png"):
+            old.unlink()
+        (user_faces_dir / _CLAHE_MARKER).touch()
+
+    cam = VideoCaptureThreading(0)
     if not cam.isOpened():
+        cam.stop()
         raise RuntimeError("Camera could not be opened.")
+    cam.start()
 
     saved_count = 0
 
-    while saved_count < required_samples:
-        ret, frame = cam.read()
-        if not ret:
-            continue
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        face_rect = _detect_face_gray(gray)
-
-        if face_rect is not None:
-            x, y, w, h = face_rect
-            face = gray[y:y + h, x:x + w]
-
-            try:
-                face_resized = cv2.resize(face, FACE_SIZE)
-            except Exception:
+    try:
+        while saved_count < required_samples:
+            # blocks until the reader decodes a frame grabbed for this request
+            ret, frame = cam.read()
+            if not ret:
                 continue
 
-            filepath = user_faces_dir / f"face_{saved_count + 1}.png"
-            cv2.imwrite(str(filepath), face_resized)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            face_rect = _detect_face_gray(gray)
 
-            saved_count += 1
-            yield 1
+            if face_rect is not None:
+                x, y, w, h = face_rect
+                face = gray[y:y + h, x:x + w]
 
-        cv2.waitKey(30)
+                try:
+                    face_resized = cv2.resize(FACE_CLAHE.apply(face), FACE_SIZE)
+                except Exception:
+                    continue
 
-    cam.release()
-    cv2.destroyAllWindows()
+                filepath = user_faces_dir / f"face_{saved_count + 1}.png"
+                cv2.imwrite(str(filepath), face_resized)
+
+                saved_count += 1
+                yield str(filepath)
+    finally:
+        cam.stop()
+        cv2.destroyAllWindows()
 
 
 # -----------------------------------------------------------
@@ -85,22 +193,30 @@ def capture_and_save_face_samples(user_id: str, samples: int = 5):
     """
     Wraps the automatic capture system so older code calling this still works.
     """
-    saved_paths = []
-    saved_count = 0
-
-    gen = open_camera_and_capture(user_id, samples)
-    user_faces_dir = BIOMETRIC_DIR / user_id / "faces"
-
-    for _ in gen:
-        saved_count += 1
-        saved_paths.append(str(user_faces_dir / f"face_{saved_count}.png"))
-
-    return saved_count, saved_paths
+    saved_paths = list(open_camera_and_capture(user_id, samples))
+    return len(saved_paths), saved_paths
 
 
 # -----------------------------------------------------------
 # Training Data Loader
 # -----------------------------------------------------------
+def _load_user_faces(user_id: str, sample_paths: Optional[List[str]] = None) -> np.ndarray:
+    """
+    Read a user's samples into one contiguous (N, H, W) uint8 array.
+    """
+    if sample_paths is None:
+        sample_paths = list((BIOMETRIC_DIR / user_id / "faces").glob("*.png"))
+    faces = np.empty((len(sample_paths), FACE_SIZE[1], FACE_SIZE[0]), dtype=np.uint8)
+    count = 0
+    for img_path in sample_paths:
+        img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            continue
+        faces[count] = cv2.resize(img, FACE_SIZE)
+        count += 1
+    return faces[:count]
+
+
 def _gather_training_data() -> Tuple[List[np.ndarray], List[int], dict]:
     faces = []
     labels = []
@@ -118,14 +234,9 @@ def _gather_training_data() -> Tuple[List[np.ndarray], List[int], dict]:
         user_id = user_folder.name
         label_map[current_label] = user_id
 
-        for img_path in faces_dir.glob("*.png"):
-            img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
-            if img is None:
-                continue
-
-            img_resized = cv2.resize(img, FACE_SIZE)
-            faces.append(img_resized)
-            labels.append(current_label)
+        user_faces = _load_user_faces(user_id)
+        faces.extend(user_faces)
+        labels.extend([current_label] * len(user_faces))
 
         current_label += 1
 
@@ -135,10 +246,56 @@ def _gather_training_data() -> Tuple[List[np.ndarray], List[int], dict]:
 # -----------------------------------------------------------
 # Model Training
 # -----------------------------------------------------------
-def train_lbph_recognizer(model_path: Path = BIOMETRIC_DIR / "lbph_model.yml"):
+def _update_lbph_recognizer(model_path: Path, user_id: str,
+                            sample_paths: Optional[List[str]] = None) -> bool:
+    """
+    Add one new user's samples to the existing model.
+    Returns False when a full retrain is needed instead.
+    """
+    if not model_path.exists() or not LABEL_MAP_FILE.exists():
+        return False
+
+    with open(LABEL_MAP_FILE, "r", encoding="utf-8") as f:
+        label_map = json.load(f)
+
+    # A re-capture must replace the user's old histograms, which update() cannot do
+    if user_id in label_map.values():
+        return False
+
+    faces = _load_user_faces(user_id, sample_paths)
+    if len(faces) == 0:
+        return False
+
+    label = max((int(k) for k in label_map), default=-1) + 1
+
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(str(model_path))
+    # list() hands OpenCV views into the stacked array, not copies
+    recognizer.update(list(faces), np.full(len(faces), label, dtype=np.int32))
+    recognizer.write(str(model_path))
+
+    label_map[str(label)] = user_id
+    with open(LABEL_MAP_FILE, "w", encoding="utf-8") as f:
+        json.dump(label_map, f, indent=2)
+
+    print(f"Model updated with {len(faces)} sample(s) for user {user_id}.")
+    return True
+
+
+def train_lbph_recognizer(model_path: Path = BIOMETRIC_DIR / "lbph_model.yml",
+                          new_user_id: Optional[str] = None,
+                          sample_paths: Optional[List[str]] = None):
     """
     Train LBPH model using all stored user images.
+    With new_user_id, only that user's samples (or just sample_paths, when
+    given) are added to the existing model.
     """
+    # a migrated gallery, or a model still holding raw histograms, needs a full retrain
+    migrated = _equalise_gallery()
+    incremental = not migrated and _model_marker(model_path).exists()
+    if incremental and new_user_id is not None and _update_lbph_recognizer(model_path, new_user_id, sample_paths):
+        return True
+
     faces, labels, label_map = _gather_training_data()
 
     if len(faces) == 0:
@@ -148,6 +305,7 @@ def train_lbph_recognizer(model_path: Path = BIOMETRIC_DIR / "lbph_model.yml"):
     recognizer = cv2.face.LBPHFaceRecognizer_create()
     recognizer.train(faces, np.array(labels, dtype=np.int32))
     recognizer.write(str(model_path))
+    _model_marker(model_path).touch()
 
     with open(LABEL_MAP_FILE, "w", encoding="utf-8") as f:
         json.dump(label_map, f, indent=2)
@@ -166,6 +324,10 @@ def predict_face(threshold: float = 60.0) -> Tuple[Optional[str], float]:
     """
     model_path = BIOMETRIC_DIR / "lbph_model.yml"
 
+    # until the training worker has migrated a pre-CLAHE gallery, the model
+    # holds raw histograms and the probe must stay raw to match them
+    equalise_probe = _model_marker(model_path).exists()
+
     if not model_path.exists():
         print("No trained LBPH model found.")
         return None, float("inf")
@@ -194,6 +356,8 @@ def predict_face(threshold: float = 60.0) -> Tuple[Optional[str], float]:
 
     x, y, w, h = face_rect
     face = gray[y:y + h, x:x + w]
+    if equalise_probe:
+        face = FACE_CLAHE.apply(face)
     face_resized = cv2.resize(face, FACE_SIZE)
 
     label, confidence = recognizer.predict(face_resized)
@@ -1,9 +1,12 @@
 import hashlib
 import json
+import threading
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
 
+from utils.helpers import atomic_write_json
+
 
 REQUIRED_EHR_FIELDS = {
     "name",
@@ -20,6 +23,9 @@ REQUIRED_EHR_FIELDS = {
 class BlockchainLogger:
     def __init__(self, ledger_path="data/ledger.json"):
         self.ledger_path = Path(ledger_path)
+        # serialises read-modify-write appends; readers need no lock because
+        # the ledger is only ever replaced whole, never rewritten in place
+        self._write_lock = threading.Lock()
         self._ensure_ledger()
 
     # ------------------------------------------------------------------
@@ -100,23 +106,40 @@ class BlockchainLogger:
         """
         Log a blockchain event for admins and users.
         """
-        block = {
-            "timestamp": int(time.time()),
-            "user_id": user_id,
-            "action": action,
-            "metadata": metadata,
-            "prev_hash": self._get_last_hash()
-        }
+        self.log_events([(user_id, action, metadata)])
 
-        block["hash"] = self._calculate_hash(block)
+    def log_events(self, events: List[Tuple[str, str, Dict[str, Any]]]):
+        """
+        Append several (user_id, action, metadata) events as chained blocks.
+        The ledger is read and written once for the whole batch.
+        """
+        if not events:
+            return
 
+        with self._write_lock:
+            self._append_blocks(events)
+
+    def _append_blocks(self, events: List[Tuple[str, str, Dict[str, Any]]]):
         with open(self.ledger_path, "r") as f:
             ledger: List[Dict[str, Any]] = json.load(f)
 
-        ledger.append(block)
-
-        with open(self.ledger_path, "w") as f:
-            json.dump(ledger, f, indent=4)
+        prev_hash = ledger[-1]["hash"] if ledger else "GENESIS"
+        timestamp = int(time.time())
+
+        for user_id, action, metadata in events:
+            block = {
+                "timestamp": timestamp,
+                "user_id": user_id,
+                "action": action,
+                "metadata": metadata,
+                "prev_hash": prev_hash
+            }
+            block["hash"] = self._calculate_hash(block)
+            ledger.append(block)
+            prev_hash = block["hash"]
+
+        # swapped in whole, so a reader on another thread never sees a partial file
+        atomic_write_json(self.ledger_path, ledger, indent=4)
 
     # ------------------------------------------------------------------
     # Read Operations
@@ -0,0 +1,36 @@
+import customtkinter as ctk
+
+# (attribute, placeholder or initial value, show character or combo values)
+# Combo boxes also get a StringVar stored as <name>_var.
+_FORM_FIELDS = (
+    ("name_entry", "Full Name", None),
+    ("dob_entry", "DOB (YYYY-MM-DD)", None),
+    ("gender_combo", "Select Gender", ["Male", "Female", "Other"]),
+    ("email_entry", "Email", None),
+    ("password_entry", "Password", "*"),
+    ("biometric_combo", "Face", ["Face", "Fingerprint"]),
+)
+
+
+class _AuthFormBase(ctk.CTkFrame):
+    """
+    Builds the registration form card from _FORM_FIELDS, one widget per row,
+    each stored on the page under its attribute name. RegistrationPage is the
+    only user; LoginPage lays out its own entries.
+    """
+
+    def _build_form_card(self) -> ctk.CTkFrame:
+        form_card = ctk.CTkFrame(self, corner_radius=15, fg_color="white")
+        form_card.pack(padx=40, pady=20, fill="both", expand=False)
+
+        for attr, text, option in _FORM_FIELDS:
+            if attr.endswith("_combo"):
+                var = ctk.StringVar(value=text)
+                setattr(self, attr[:-len("_combo")] + "_var", var)
+                widget = ctk.CTkComboBox(form_card, values=option, variable=var, state="readonly")
+            else:
+                widget = ctk.CTkEntry(form_card, placeholder_text=text, show=option)
+            widget.pack(pady=10, padx=20)
+            setattr(self, attr, widget)
+
+        return form_card
@@ -81,10 +81,10 @@ class BlockchainViewer(ctk.CTkFrame):
 
         # If not admin, show only logs for the current user
         current_user = None
-        if self.controller.frames["DashboardPage"].is_admin:
+        if self.controller.get_frame("DashboardPage").is_admin:
             current_user = None
         else:
-            current_user = self.controller.frames["DashboardPage"].user_id
+            current_user = self.controller.get_frame("DashboardPage").user_id
 
         # Insert rows
         for ev in sorted(logs, key=lambda x: x.get("timestamp", ""), reverse=True):
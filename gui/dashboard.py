@@ -1,15 +1,26 @@
 # gui/dashboard.py
+import io
 import json
-import tempfile
-import shutil
+import re
+import queue
+import atexit
+import zipfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
 
-from utils.helpers import load_users, save_users, save_ehr_for_user, load_user_ehr, EHR_DIR
+from utils.helpers import (
+    load_users, save_users, save_ehr_for_user, save_ehr_for_user_obj, load_user_ehr, display_user_id,
+    ehr_suffix, ehr_export_name, open_ehr_file, export_ehr_file, extract_pdf_text_pdfium,
+    EHR_DIR, EHR_COMPRESSED_SUFFIX, pdfium
+)
 from blockchain.logger import BlockchainLogger
 
 # Optional dependencies for PDF rendering
@@ -20,6 +31,31 @@ try:
 except Exception:
     PDF_IMAGES_AVAILABLE = False
 
+# Optional streaming JSON parser for reading a few fields out of large EHRs
+try:
+    import ijson
+except Exception:
+    ijson = None
+
+# Optional fast JSON codec (stdlib json is the fallback)
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# Number of extracted PDF texts kept in memory for repeat views
+_PDF_CACHE_SIZE = 32
+
+# Files above this size are shown as raw text instead of parsed and reformatted
+_LARGE_EHR_BYTES = 256 * 1024
+# Size of each insert when streaming large files into a textbox
+_TEXTBOX_CHUNK = 64 * 1024
+
+# Ledger events are written in batches of up to this many
+_LOG_BATCH_SIZE = 32
+# How long the ledger writer waits for more events before flushing a batch
+_LOG_BATCH_WAIT = 0.05
+
 # Required fields for an EHR record to be considered valid
 _REQUIRED_EHR_FIELDS = [
     "name",
@@ -30,6 +66,66 @@ _REQUIRED_EHR_FIELDS = [
     "medical_history"  # medical_history can be a string or object
 ]
 
+_UTF8_BOM = b"\xef\xbb\xbf"
+# 20+ digit runs may be integers past orjson's 64-bit range
+_LONG_DIGIT_RUN = re.compile(rb"\d{20,}")
+
+
+def _load_json_file(path) -> Any:
+    """Parse a stored JSON EHR; the result is the same whether or not orjson is installed."""
+    with open_ehr_file(path) as fh:
+        data = fh.read()
+    if orjson is not None:
+        # orjson rejects a BOM, which json.loads(bytes) accepts
+        body = data[3:] if data.startswith(_UTF8_BOM) else data
+        # orjson turns integers wider than 64 bits into floats; leave those to json
+        if not _LONG_DIGIT_RUN.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass  # e.g. NaN/Infinity, which json accepts
+    return json.loads(data)
+
+
+def _dumps_json(obj: Any) -> str:
+    """Pretty-print an object as two-space indented JSON text."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except orjson.JSONEncodeError:
+            pass  # integers wider than 64 bits
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def _looks_like_json(buf: bytes) -> bool:
+    """Cheap check on a file prefix: does the first non-whitespace byte open an object or array?"""
+    if buf.startswith(_UTF8_BOM):
+        buf = buf[3:]
+    stripped = buf.lstrip(b" \t\r\n")
+    return stripped[:1] in (b"{", b"[")
+
+
+def _load_ehr_fields(path: Path, fields) -> Dict[str, Any]:
+    """
+    Read only the requested top-level keys from a JSON EHR.
+    Streams the document and stops once every field has been seen.
+    """
+    wanted = set(fields)
+    if ijson is None:
+        data = _load_json_file(path)
+        if not isinstance(data, dict):
+            return {}
+        return {k: data[k] for k in wanted if k in data}
+
+    collected: Dict[str, Any] = {}
+    with open_ehr_file(path) as fh:
+        for key, value in ijson.kvitems(fh, "", use_float=True):
+            if key in wanted:
+                collected[key] = value
+                if len(collected) == len(wanted):
+                    break
+    return collected
+
 
 class DashboardPage(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -37,14 +133,30 @@ class DashboardPage(ctk.CTkFrame):
         self.controller = controller
         self.auth = controller.auth
         self.user_id: Optional[str] = None
+        self._user_profile: Optional[Dict[str, Any]] = None
         self.is_admin = False
+        self._refresh_pending = False
 
-        # Blockchain logger (ledger)
+        # Blockchain logger (ledger); events are queued and written by a background thread
         self.blockchain_logger = BlockchainLogger()
+        self._log_q: "queue.Queue[Tuple[str, str, Dict[str, Any]]]" = queue.Queue()
+        threading.Thread(target=self._log_writer, daemon=True).start()
+        # make sure queued events reach the ledger before the interpreter exits
+        atexit.register(self._log_q.join)
+        # views of the ledger currently on screen, redrawn when a batch lands
+        self._log_frame = None
+        self._ledger_body = None
 
         # Keep references to PhotoImage objects for PDF previews to avoid GC
         self._image_refs: List = []
 
+        # Extracted PDF text keyed on (path, mtime_ns, size), oldest first
+        self._pdf_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._pdf_cache_lock = threading.Lock()
+
+        # Worker threads for text extraction so large PDFs do not freeze the UI
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
+
         # Base layout
         self.grid(row=0, column=0, sticky="nsew")
         self.configure(fg_color="#f5f5f5")
@@ -107,6 +219,21 @@ class DashboardPage(ctk.CTkFrame):
         self.view_ledger_btn.grid(row=0, column=1, padx=(0, 8))
         self.refresh_admin_table()
 
+    def _schedule_refresh(self):
+        """Coalesce bursts of changes into a single rebuild of the current view."""
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        self.after(50, self._do_refresh)
+
+    def _do_refresh(self):
+        self._refresh_pending = False
+        if self.is_admin:
+            self.refresh_admin_table()
+        elif self.user_id:
+            self.render_user_profile()
+            self.refresh_user_log()
+
     def refresh_admin_table(self):
 
         for w in self.table_frame.winfo_children():
@@ -129,7 +256,7 @@ class DashboardPage(ctk.CTkFrame):
             row = ctk.CTkFrame(self.table_frame, fg_color="#f7fafc", corner_radius=8)
             row.pack(fill="x", padx=8, pady=4)
 
-            display_uid = str(uid).zfill(5)
+            display_uid = display_user_id(uid)
             ctk.CTkLabel(row, text=display_uid, width=120, anchor="w").grid(row=0, column=0, padx=4)
             ctk.CTkLabel(row, text=user.get("name", ""), width=180, anchor="w").grid(row=0, column=1, padx=4)
             ctk.CTkLabel(row, text=user.get("dob", ""), width=120, anchor="w").grid(row=0, column=2, padx=4)
@@ -144,9 +271,9 @@ class DashboardPage(ctk.CTkFrame):
                 fname = Path(last_file_path).name
                 ctk.CTkLabel(last_file_frame, text=fname, anchor="w", width=220).pack(side="left", padx=(0, 6))
                 ctk.CTkButton(last_file_frame, text="View", width=70,
-                              command=lambda p=last_file_path, u=uid: self.view_ehr_modal(u, p)).pack(side="left")
+                              command=partial(self.view_ehr_modal, uid, last_file_path)).pack(side="left")
                 ctk.CTkButton(last_file_frame, text="Path", width=60,
-                              command=lambda p=last_file_path: messagebox.showinfo("File Path", p)).pack(side="left", padx=(6,0))
+                              command=partial(messagebox.showinfo, "File Path", last_file_path)).pack(side="left", padx=(6,0))
             else:
                 ctk.CTkLabel(last_file_frame, text="None", anchor="w", width=220).pack(side="left")
 
@@ -155,16 +282,16 @@ class DashboardPage(ctk.CTkFrame):
             actions.grid(row=0, column=4, padx=6)
 
             ctk.CTkButton(actions, text="Edit", width=80,
-                          command=lambda u=uid: self.open_edit_ehr_modal(u)).pack(side="left", padx=3)
+                          command=partial(self.open_edit_ehr_modal, uid)).pack(side="left", padx=3)
 
             ctk.CTkButton(actions, text="Download", width=80,
-                          command=lambda u=uid: self.admin_download_latest_ehr(u)).pack(side="left", padx=3)
+                          command=partial(self.admin_download_latest_ehr, uid)).pack(side="left", padx=3)
 
             ctk.CTkButton(actions, text="Upload", width=80,
-                          command=lambda u=uid: self.upload_ehr_for_user(u)).pack(side="left", padx=3)
+                          command=partial(self.upload_ehr_for_user, uid)).pack(side="left", padx=3)
 
             ctk.CTkButton(actions, text="Delete", width=80, fg_color="#ff5c5c",
-                          hover_color="#ff1f1f", command=lambda u=uid: self.delete_user(u)).pack(side="left", padx=3)
+                          hover_color="#ff1f1f", command=partial(self.delete_user, uid)).pack(side="left", padx=3)
 
     def upload_ehr_for_user(self, user_id: str):
         file_path = filedialog.askopenfilename(
@@ -174,37 +301,48 @@ class DashboardPage(ctk.CTkFrame):
         if not file_path:
             return
 
+        # Sniff the content instead of trusting the extension, so JSON saved as .txt
+        # still parses and plain text / PDFs never go through a JSON parser
+        try:
+            with open(file_path, "rb") as fh:
+                is_json = _looks_like_json(fh.read(4096))
+        except OSError as e:
+            messagebox.showerror("Unreadable", f"Could not read file: {e}")
+            return
+
         ehr_obj = None
-        if file_path.lower().endswith(".json"):
+        if is_json:
             try:
-                with open(file_path, "r", encoding="utf-8") as fh:
-                    ehr_obj = json.load(fh)
+                ehr_obj = _load_json_file(file_path)
             except Exception as e:
                 messagebox.showerror("Invalid JSON", f"Could not parse JSON: {e}")
                 return
         else:
-            # attempt to extract text and create minimal object
-            extracted = self._extract_text_from_file(file_path)
-            if not extracted:
-                messagebox.showerror("Unsupported", "Could not extract text from file for validation.")
-                return
-            try:
-                ehr_obj = json.loads(extracted)
-            except Exception:
-                ehr_obj = {"_raw_text": extracted}
+            # attempt to extract text off the UI thread and create minimal object
+            self._extract_text_async(file_path, partial(self._on_upload_text_extracted, user_id, file_path))
+            return
+
+        self._finish_upload(user_id, file_path, ehr_obj, is_json)
+
+    def _on_upload_text_extracted(self, user_id: str, file_path: str, extracted: Optional[str]):
+        if not extracted:
+            messagebox.showerror("Unsupported", "Could not extract text from file for validation.")
+            return
+        self._finish_upload(user_id, file_path, {"_raw_text": extracted}, False)
 
+    def _finish_upload(self, user_id: str, file_path: str, ehr_obj: Any, is_json: bool):
         if not self._validate_ehr_object(ehr_obj):
             messagebox.showerror("Invalid EHR", "Uploaded file is missing required EHR fields.")
             return
 
-        saved = save_ehr_for_user(user_id, file_path)
-        self.blockchain_logger.log_event(user_id=user_id, action="EHR_FILE_UPLOADED", metadata={"file": saved})
-        messagebox.showinfo("Success", f"EHR uploaded for User {str(user_id).zfill(5)}")
-        self.refresh_admin_table()
-
-        # If the currently logged in user is the same user, refresh their profile
-        if self.user_id == user_id and not self.is_admin:
-            self.render_user_profile()
+        if is_json:
+            # already parsed; write the object instead of re-reading the source
+            saved = save_ehr_for_user_obj(user_id, ehr_obj, Path(file_path).with_suffix(".json").name)
+        else:
+            saved = save_ehr_for_user(user_id, file_path)
+        self._log_event(user_id=user_id, action="EHR_FILE_UPLOADED", metadata={"file": saved})
+        messagebox.showinfo("Success", f"EHR uploaded for User {display_user_id(user_id)}")
+        self._schedule_refresh()
 
     def admin_download_latest_ehr(self, user_id: str):
         files = load_user_ehr(user_id)
@@ -212,55 +350,33 @@ class DashboardPage(ctk.CTkFrame):
             messagebox.showwarning("No files", "No EHR files for this user.")
             return
         last = files[-1]
-        target = filedialog.asksaveasfilename(title="Save EHR as", initialfile=Path(last).name)
+        target = filedialog.asksaveasfilename(title="Save EHR as", initialfile=ehr_export_name(last))
         if not target:
             return
         try:
-            shutil.copy(last, target)
-            self.blockchain_logger.log_event(user_id=user_id, action="ADMIN_DOWNLOADED_EHR", metadata={"file": target})
+            export_ehr_file(last, target)
+            self._log_event(user_id=user_id, action="ADMIN_DOWNLOADED_EHR", metadata={"file": target})
             messagebox.showinfo("Saved", f"EHR copied to {target}")
         except Exception as e:
             messagebox.showerror("Failed", f"Copy failed: {e}")
 
-    def download_all_users_ehr(self):
-        """Export all users' EHRs as zip file."""
-        users = load_users()
-        if not users:
-            messagebox.showwarning("No users", "There are no users to export.")
-            return
-        target = filedialog.asksaveasfilename(defaultextension=".zip", filetypes=[("Zip", "*.zip")],
-                                              title="Save combined EHR ZIP as")
-        if not target:
-            return
-        tmpdir = tempfile.mkdtemp()
-        try:
-            for uid in users.keys():
-                src = Path(EHR_DIR) / str(uid)
-                if src.exists():
-                    dest = Path(tmpdir) / str(uid)
-                    shutil.copytree(src, dest)
-            shutil.make_archive(base_name=Path(target).with_suffix(""), format="zip", root_dir=tmpdir)
-            self.blockchain_logger.log_event(user_id="Admin", action="DOWNLOAD_ALL_EHRS", metadata={"out": target})
-            messagebox.showinfo("Exported", f"All EHRs exported to {target}")
-        except Exception as e:
-            messagebox.showerror("Export failed", f"Failed to export: {e}")
-        finally:
-            shutil.rmtree(tmpdir, ignore_errors=True)
-
     def delete_user(self, user_id: str):
-        confirm = messagebox.askyesno("Delete user", f"Delete User {str(user_id).zfill(5)}?")
+        if not self.is_admin:
+            return
+        confirm = messagebox.askyesno("Delete user", f"Delete User {display_user_id(user_id)}?")
         if not confirm:
             return
         self.auth.users.pop(user_id, None)
         save_users(self.auth.users)
-        self.blockchain_logger.log_event(user_id=user_id, action="USER_DELETED", metadata={})
+        self._log_event(user_id=user_id, action="USER_DELETED", metadata={})
         messagebox.showinfo("Deleted", "User removed.")
-        self.refresh_admin_table()
+        self._schedule_refresh()
 
     # ---------------------- Edit / Manual EHR Modal ----------------------
     def open_edit_ehr_modal(self, user_id: str):
         modal = ctk.CTkToplevel(self)
-        modal.title(f"Edit EHR - {str(user_id).zfill(5)}")
+        display_uid = display_user_id(user_id)
+        modal.title(f"Edit EHR - {display_uid}")
         modal.geometry("760x540")
         modal.grab_set()
         modal.transient(self)
@@ -268,7 +384,7 @@ class DashboardPage(ctk.CTkFrame):
         card = ctk.CTkFrame(modal, fg_color="white", corner_radius=12)
         card.pack(fill="both", expand=True, padx=12, pady=12)
 
-        ctk.CTkLabel(card, text=f"Edit EHR - User {str(user_id).zfill(5)}",
+        ctk.CTkLabel(card, text=f"Edit EHR - User {display_uid}",
                      font=ctk.CTkFont(size=16, weight="bold")).pack(anchor="w", padx=8, pady=(6, 6))
 
         # Prefill from latest file if present
@@ -277,9 +393,8 @@ class DashboardPage(ctk.CTkFrame):
         if files:
             last_path = Path(files[-1])
             try:
-                if last_path.suffix.lower() == ".json":
-                    with open(last_path, "r", encoding="utf-8") as fh:
-                        existing = json.load(fh)
+                if ehr_suffix(last_path) == ".json":
+                    existing = _load_ehr_fields(last_path, _REQUIRED_EHR_FIELDS)
                 else:
                     # non-json fallback: keep raw_text
                     existing = {"_raw_text": self._extract_text_from_file(str(last_path)) or ""}
@@ -333,21 +448,17 @@ class DashboardPage(ctk.CTkFrame):
                 "blood_group": ent_bg.get().strip(),
                 "medical_history": txt_med.get("0.0", "end").strip()
             }
-            if not self._validate_ehr_object(ehr_obj):
-                messagebox.showerror("Invalid", "Please complete required EHR fields.")
+            # the form always produces exactly the required keys, so only emptiness needs checking
+            missing = [k for k in _REQUIRED_EHR_FIELDS if not ehr_obj[k]]
+            if missing:
+                messagebox.showerror("Invalid EHR", f"Please fill: {', '.join(missing)}")
                 return
             try:
-                tmp = tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json", encoding="utf-8")
-                json.dump(ehr_obj, tmp, indent=2)
-                tmp.close()
-                saved = save_ehr_for_user(user_id, tmp.name)
-                self.blockchain_logger.log_event(user_id=user_id, action="EHR_MANUALLY_UPDATED", metadata={"file": saved})
+                saved = save_ehr_for_user_obj(user_id, ehr_obj)
+                self._log_event(user_id=user_id, action="EHR_MANUALLY_UPDATED", metadata={"file": saved})
                 messagebox.showinfo("Saved", "EHR saved successfully.")
                 modal.destroy()
-                self.refresh_admin_table()
-                # if same user is logged in (non-admin) refresh profile
-                if self.user_id == user_id and not self.is_admin:
-                    self.render_user_profile()
+                self._schedule_refresh()
             except Exception as e:
                 messagebox.showerror("Failed", f"Failed to save: {e}")
 
@@ -358,7 +469,7 @@ class DashboardPage(ctk.CTkFrame):
     # ---------------------- EHR Viewer (human friendly) ----------------------
     def view_ehr_modal(self, user_id: str, file_path: str):
         modal = ctk.CTkToplevel(self)
-        modal.title(f"EHR Viewer - {str(user_id).zfill(5)}")
+        modal.title(f"EHR Viewer - {display_user_id(user_id)}")
         modal.geometry("900x700")
         modal.grab_set()
         modal.transient(self)
@@ -383,19 +494,23 @@ class DashboardPage(ctk.CTkFrame):
         right.pack(side="left", fill="both", expand=True, padx=(0, 4), pady=4)
 
         # Load content
-        suffix = file_obj.suffix.lower()
+        suffix = ehr_suffix(file_obj)
+        is_large = (suffix in (".json", ".txt", ".md", ".csv")
+                    and file_obj.stat().st_size > _LARGE_EHR_BYTES)
         parsed = {}
         raw_text = None
         try:
-            if suffix == ".json":
-                with open(file_obj, "r", encoding="utf-8") as fh:
-                    parsed = json.load(fh)
+            if suffix == ".json" and is_large:
+                # summary fields only; the full document is streamed into the right pane
+                parsed = _load_ehr_fields(file_obj, _REQUIRED_EHR_FIELDS)
+            elif suffix == ".json":
+                parsed = _load_json_file(file_obj)
             elif suffix in (".txt", ".md", ".csv"):
                 with open(file_obj, "r", encoding="utf-8", errors="ignore") as fh:
-                    raw_text = fh.read()
+                    raw_text = fh.read(1000 if is_large else -1)
             elif suffix == ".pdf":
-                # attempt to extract text; still will render as images below
-                raw_text = self._extract_text_from_file(str(file_obj))
+                # text is extracted in the background below; pages still render as images
+                raw_text = None
             else:
                 raw_text = None
         except Exception:
@@ -404,9 +519,20 @@ class DashboardPage(ctk.CTkFrame):
         # Friendly summary on left
         def add_kv(label, value):
             ctk.CTkLabel(left, text=f"{label}:", anchor="w", font=ctk.CTkFont(size=12, weight="bold")).pack(anchor="w", padx=8, pady=(8, 2))
-            ctk.CTkLabel(left, text=value if value else "N/A", wraplength=300, anchor="w").pack(anchor="w", padx=8, pady=(0, 4))
+            value_label = ctk.CTkLabel(left, text=value if value else "N/A", wraplength=300, anchor="w")
+            value_label.pack(anchor="w", padx=8, pady=(0, 4))
+            return value_label
 
-        if isinstance(parsed, dict) and parsed:
+        if suffix == ".pdf":
+            preview_label = add_kv("Preview", "Loading...")
+
+            def show_pdf_text(text: Optional[str]):
+                if not preview_label.winfo_exists():
+                    return
+                preview_label.configure(text=(text[:1000] + "...") if text else "No structured data available")
+
+            self._extract_text_async(str(file_obj), show_pdf_text)
+        elif isinstance(parsed, dict) and parsed:
             add_kv("Name", parsed.get("name", ""))
             add_kv("Address", parsed.get("address", ""))
             add_kv("DOB", parsed.get("dob", ""))
@@ -417,7 +543,11 @@ class DashboardPage(ctk.CTkFrame):
             add_kv("Preview", (raw_text[:1000] + "...") if raw_text else "No structured data available")
 
         # Right side: full preview. If JSON, display mapped fields in nice layout; if PDF, render images
-        if suffix == ".json" and isinstance(parsed, dict):
+        if is_large:
+            tb = ctk.CTkTextbox(right, width=760, height=420)
+            tb.pack(fill="both", expand=True, padx=8, pady=8)
+            self._stream_into_textbox(tb, file_obj)
+        elif suffix == ".json" and isinstance(parsed, dict):
             # display as labeled sections (not raw JSON)
             right_inner = ctk.CTkFrame(right, fg_color="transparent")
             right_inner.pack(fill="both", expand=True, padx=8, pady=8)
@@ -426,7 +556,7 @@ class DashboardPage(ctk.CTkFrame):
             for i, (k, v) in enumerate(parsed.items()):
                 lbl = ctk.CTkLabel(right_inner, text=str(k).replace("_", " ").capitalize(), font=ctk.CTkFont(size=12, weight="bold"), anchor="w")
                 lbl.grid(row=i*2, column=0, sticky="w", padx=4, pady=(6, 2))
-                val = ctk.CTkLabel(right_inner, text=(json.dumps(v, indent=2, ensure_ascii=False) if isinstance(v, (dict, list)) else str(v)), anchor="w", wraplength=520)
+                val = ctk.CTkLabel(right_inner, text=(_dumps_json(v) if isinstance(v, (dict, list)) else str(v)), anchor="w", wraplength=520)
                 val.grid(row=i*2+1, column=0, sticky="w", padx=4, pady=(0, 6))
         elif suffix == ".pdf":
             # Render PDF pages to images if dependencies available
@@ -477,12 +607,12 @@ class DashboardPage(ctk.CTkFrame):
         actions.pack(fill="x", padx=8, pady=8)
 
         def download_here():
-            target = filedialog.asksaveasfilename(initialfile=file_obj.name, title="Save EHR as")
+            target = filedialog.asksaveasfilename(initialfile=ehr_export_name(file_obj), title="Save EHR as")
             if not target:
                 return
             try:
-                shutil.copy(str(file_obj), target)
-                self.blockchain_logger.log_event(user_id=user_id, action="EHR_VIEW_DOWNLOAD", metadata={"file": target})
+                export_ehr_file(str(file_obj), target)
+                self._log_event(user_id=user_id, action="EHR_VIEW_DOWNLOAD", metadata={"file": target})
                 messagebox.showinfo("Saved", f"File saved: {target}")
             except Exception as e:
                 messagebox.showerror("Failed", f"Failed to save: {e}")
@@ -491,26 +621,35 @@ class DashboardPage(ctk.CTkFrame):
         ctk.CTkButton(actions, text="Close", width=100, command=modal.destroy).pack(side="right")
 
     # --------------------- User View / Logs / Profile ---------------------
-    def set_user(self, user_id: str):
-        """Set user view and render friendly profile and logs"""
+    def set_user(self, user_id: str, profile: Optional[Dict[str, Any]] = None):
+        """Set user view and render friendly profile and logs. Pass profile if already fetched."""
         self.user_id = user_id
         self.is_admin = False
-        name = self.auth.users.get(user_id, {}).get("name") if self.auth.users else None
-        welcome = f"Welcome, {name}" if name else f"Welcome, User {str(user_id).zfill(5)}"
+        if profile is None:
+            profile = self.auth.users.get(user_id, {}) if self.auth.users else {}
+        self._user_profile = profile
+        name = profile.get("name")
+        welcome = f"Welcome, {name}" if name else f"Welcome, User {display_user_id(user_id)}"
         self.title_label.configure(text="User Dashboard")
         self.info_label.configure(text=welcome)
+        # render now so nothing from a previous session stays on screen;
+        # only refreshes after mutations are coalesced
         self.render_user_profile()
         self.refresh_user_log()
 
-    def render_user_profile(self):
+    def render_user_profile(self, profile: Optional[Dict[str, Any]] = None):
         """Render user profile and a friendly preview of latest EHR (not raw JSON)"""
+        if profile is not None:
+            self._user_profile = profile
         for w in self.table_frame.winfo_children():
             w.destroy()
 
         profile_frame = ctk.CTkFrame(self.table_frame, fg_color="transparent")
         profile_frame.pack(fill="x", padx=10, pady=10)
 
-        user = self.auth.users.get(self.user_id, {}) if self.auth.users else {}
+        user = self._user_profile
+        if user is None:
+            user = self.auth.users.get(self.user_id, {}) if self.auth.users else {}
         name = user.get("name", "Unknown")
         dob = user.get("dob", "Unknown")
         email = user.get("email", "Unknown")
@@ -536,9 +675,8 @@ class DashboardPage(ctk.CTkFrame):
 
             # Friendly rendering: if json show key/value table, else show text snippet
             try:
-                if latest_path.suffix.lower() == ".json":
-                    with open(latest_path, "r", encoding="utf-8") as fh:
-                        parsed = json.load(fh)
+                if ehr_suffix(latest_path) == ".json":
+                    parsed = _load_json_file(latest_path)
                     # grid key value table
                     grid_frame = ctk.CTkFrame(preview_card, fg_color="transparent")
                     grid_frame.pack(fill="both", expand=True, padx=8, pady=8)
@@ -554,10 +692,17 @@ class DashboardPage(ctk.CTkFrame):
                     med_tb.insert("0.0", str(parsed.get("medical_history", "")))
                     med_tb.grid(row=r, column=1, padx=6, pady=(8,4))
                 else:
-                    txt = self._extract_text_from_file(str(latest_path)) or "Preview not available"
                     tb = ctk.CTkTextbox(preview_card, width=760, height=260)
-                    tb.insert("0.0", txt[:3000])
+                    tb.insert("0.0", "Loading...")
                     tb.pack(fill="both", expand=True, padx=8, pady=8)
+
+                    def show_text(text: Optional[str]):
+                        if not tb.winfo_exists():
+                            return
+                        tb.delete("0.0", "end")
+                        tb.insert("0.0", (text or "Preview not available")[:3000])
+
+                    self._extract_text_async(str(latest_path), show_text)
             except Exception as e:
                 ctk.CTkLabel(preview_card, text=f"Preview failed: {e}").pack(padx=8, pady=8)
 
@@ -572,33 +717,38 @@ class DashboardPage(ctk.CTkFrame):
     def _download_file(self, src_path: str):
         """Utility to prompt and copy file"""
         src = Path(src_path)
-        target = filedialog.asksaveasfilename(initialfile=src.name, title="Save file as")
+        target = filedialog.asksaveasfilename(initialfile=ehr_export_name(src), title="Save file as")
         if not target:
             return
         try:
-            shutil.copy(str(src), target)
-            self.blockchain_logger.log_event(user_id=self.user_id or "Unknown", action="USER_DOWNLOADED_EHR", metadata={"file": target})
+            export_ehr_file(str(src), target)
+            self._log_event(user_id=self.user_id or "Unknown", action="USER_DOWNLOADED_EHR", metadata={"file": target})
             messagebox.showinfo("Saved", f"Saved to {target}")
         except Exception as e:
             messagebox.showerror("Failed", f"Failed to save: {e}")
 
     def refresh_user_log(self):
         """Render blockchain events for logged in user below profile area."""
-        # Append logs section
+        # Logs live in their own frame under the profile so a landed ledger
+        # batch redraws just this section; queued events appear once written
+        if self._log_frame is not None and self._log_frame.winfo_exists():
+            self._log_frame.destroy()
+        self._log_frame = log_frame = ctk.CTkFrame(self.table_frame, fg_color="transparent")
+        log_frame.pack(fill="x")
+
         logs = self.blockchain_logger.get_user_logs(self.user_id)
-        # simple placement: place under frames already in table_frame
-        ctk.CTkLabel(self.table_frame, text="").pack()  # spacing
+        ctk.CTkLabel(log_frame, text="").pack()  # spacing
         if not logs:
-            ctk.CTkLabel(self.table_frame, text="No blockchain logs available").pack(pady=6)
+            ctk.CTkLabel(log_frame, text="No blockchain logs available").pack(pady=6)
             return
 
-        header = ctk.CTkFrame(self.table_frame, fg_color="transparent")
+        header = ctk.CTkFrame(log_frame, fg_color="transparent")
         header.pack(fill="x", pady=4, padx=6)
         for i, h in enumerate(["When", "Action", "Hash"]):
             ctk.CTkLabel(header, text=h, width=220, anchor="w").grid(row=0, column=i, padx=6)
 
         for entry in logs:
-            row = ctk.CTkFrame(self.table_frame, fg_color="#f3f4f6", corner_radius=6)
+            row = ctk.CTkFrame(log_frame, fg_color="#f3f4f6", corner_radius=6)
             row.pack(fill="x", padx=6, pady=4)
             ts = entry.get("timestamp", "")
             # attempt friendly timestamp
@@ -645,6 +795,63 @@ class DashboardPage(ctk.CTkFrame):
                 return False
         return True
 
+    def _log_event(self, user_id: str, action: str, metadata: Dict[str, Any]):
+        """Queue a ledger event; the writer thread appends it in the next batch."""
+        self._log_q.put((user_id, action, metadata))
+
+    def _log_writer(self):
+        while True:
+            batch = [self._log_q.get()]
+            try:
+                while len(batch) < _LOG_BATCH_SIZE:
+                    batch.append(self._log_q.get(timeout=_LOG_BATCH_WAIT))
+            except queue.Empty:
+                pass
+            try:
+                self.blockchain_logger.log_events(batch)
+            except Exception as e:
+                print(f"Failed to write {len(batch)} ledger event(s): {e}")
+            finally:
+                for _ in batch:
+                    self._log_q.task_done()
+            try:
+                self.after(0, self._on_log_batch_written)
+            except Exception:
+                pass  # window already gone at shutdown
+
+    def _on_log_batch_written(self):
+        """Redraw ledger views on screen now that a batch is in the ledger."""
+        if self._ledger_body is not None and self._ledger_body.winfo_exists():
+            self._fill_ledger_overview(self._ledger_body)
+        if not self.is_admin and self.user_id and self._log_frame is not None and self._log_frame.winfo_exists():
+            self.refresh_user_log()
+
+    def _stream_into_textbox(self, tb, path: Path):
+        """Insert a file into a textbox in fixed-size chunks, yielding to the event loop between them."""
+        try:
+            fh = io.TextIOWrapper(open_ehr_file(path), encoding="utf-8", errors="ignore")
+        except Exception as e:
+            tb.insert("0.0", f"Preview failed: {e}")
+            return
+
+        def pump():
+            try:
+                chunk = fh.read(_TEXTBOX_CHUNK) if tb.winfo_exists() else ""
+            except Exception:
+                chunk = ""
+            if not chunk:
+                fh.close()
+                return
+            tb.insert("end", chunk)
+            self.after(1, pump)
+
+        pump()
+
+    def _extract_text_async(self, path: str, on_done):
+        """Extract text on the I/O pool and hand the result to on_done on the Tk thread."""
+        future = self._io_pool.submit(self._extract_text_from_file, path)
+        future.add_done_callback(lambda f: self.after(0, on_done, f.result()))
+
     def _extract_text_from_file(self, path: str) -> Optional[str]:
         p = Path(path)
         suffix = p.suffix.lower()
@@ -655,28 +862,55 @@ class DashboardPage(ctk.CTkFrame):
             except Exception:
                 return None
         if suffix == ".pdf":
-            try:
-                import PyPDF2  # local import to avoid hard dependency
-            except Exception:
-                return None
-            try:
-                reader = PyPDF2.PdfReader(str(p))
-                pages = []
-                for i, page in enumerate(reader.pages):
-                    if i >= 5:
-                        break
-                    try:
-                        text = page.extract_text() or ""
-                        pages.append(text)
-                    except Exception:
-                        continue
-                if not pages:
-                    return None
-                return "\n\n".join(pages)
-            except Exception:
-                return None
+            return self._extract_pdf_text_cached(p)
         return None
 
+    def _extract_pdf_text_cached(self, p: Path) -> Optional[str]:
+        """PDF text extraction memoized on (path, mtime, size); failures are not cached."""
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        key = (str(p), st.st_mtime_ns, st.st_size)
+        with self._pdf_cache_lock:
+            cached = self._pdf_cache.get(key)
+            if cached is not None:
+                self._pdf_cache.move_to_end(key)
+                return cached
+
+        text = self._extract_pdf_text(p)
+        if text is not None:
+            with self._pdf_cache_lock:
+                self._pdf_cache[key] = text
+                if len(self._pdf_cache) > _PDF_CACHE_SIZE:
+                    self._pdf_cache.popitem(last=False)
+        return text
+
+    def _extract_pdf_text(self, p: Path) -> Optional[str]:
+        # PDFium is used when installed, PyPDF2 otherwise
+        if pdfium is not None:
+            return extract_pdf_text_pdfium(p, max_pages=5)
+        try:
+            import PyPDF2  # local import to avoid hard dependency
+        except Exception:
+            return None
+        try:
+            reader = PyPDF2.PdfReader(str(p))
+            pages = []
+            for i, page in enumerate(reader.pages):
+                if i >= 5:
+                    break
+                try:
+                    text = page.extract_text() or ""
+                    pages.append(text)
+                except Exception:
+                    continue
+            if not pages:
+                return None
+            return "\n\n".join(pages)
+        except Exception:
+            return None
+
     def open_blockchain_overview(self):
         modal = ctk.CTkToplevel(self)
         modal.title("Blockchain Ledger")
@@ -687,13 +921,6 @@ class DashboardPage(ctk.CTkFrame):
         card = ctk.CTkFrame(modal, fg_color="white", corner_radius=10)
         card.pack(fill="both", expand=True, padx=8, pady=8)
 
-        entries = []
-        try:
-            entries = self.blockchain_logger.get_all_logs()
-        except Exception:
-            # fallback to empty
-            entries = []
-
         header = ctk.CTkFrame(card, fg_color="transparent")
         header.pack(fill="x", padx=6, pady=6)
         for i, h in enumerate(["When", "User", "Action", "Hash"]):
@@ -701,6 +928,22 @@ class DashboardPage(ctk.CTkFrame):
 
         body = ctk.CTkFrame(card, fg_color="transparent")
         body.pack(fill="both", expand=True, padx=6, pady=6)
+        # events still queued are drawn when the writer reports their batch
+        self._ledger_body = body
+        self._fill_ledger_overview(body)
+
+        ctk.CTkButton(card, text="Close", width=120, command=modal.destroy).pack(side="right", padx=12, pady=8)
+
+    def _fill_ledger_overview(self, body):
+        for w in body.winfo_children():
+            w.destroy()
+        entries = []
+        try:
+            entries = self.blockchain_logger.get_all_logs()
+        except Exception:
+            # fallback to empty
+            entries = []
+
         for e in entries:
             row = ctk.CTkFrame(body, fg_color="#f7fafc", corner_radius=6)
             row.pack(fill="x", pady=3)
@@ -719,8 +962,6 @@ class DashboardPage(ctk.CTkFrame):
             ctk.CTkLabel(row, text=hval, width=220, anchor="w").grid(row=0, column=3, padx=6)
             ctk.CTkButton(row, text="Inspect", width=100, command=lambda ev=e: self._show_full_log_entry(ev)).grid(row=0, column=4, padx=6)
 
-        ctk.CTkButton(card, text="Close", width=120, command=modal.destroy).pack(side="right", padx=12, pady=8)
-
     def export_all_ehrs(self):
         self.download_all_users_ehr()
 
@@ -733,20 +974,25 @@ class DashboardPage(ctk.CTkFrame):
                                               title="Save combined EHR ZIP as")
         if not target:
             return
-        tmpdir = tempfile.mkdtemp()
         try:
-            for uid in users.keys():
-                src = Path(EHR_DIR) / str(uid)
-                if src.exists():
-                    dest = Path(tmpdir) / str(uid)
-                    shutil.copytree(src, dest)
-            shutil.make_archive(base_name=Path(target).with_suffix(""), format="zip", root_dir=tmpdir)
-            self.blockchain_logger.log_event(user_id="Admin", action="DOWNLOAD_ALL_EHRS", metadata={"out": target})
+            with zipfile.ZipFile(target, "w") as zf:
+                for uid in users.keys():
+                    src = Path(EHR_DIR) / str(uid)
+                    if not src.is_dir():
+                        continue
+                    for f in sorted(src.iterdir()):
+                        if not f.is_file():
+                            continue
+                        # zstd files are already compressed; deflating them again is wasted work
+                        if f.suffix.lower() == EHR_COMPRESSED_SUFFIX:
+                            compress_type = zipfile.ZIP_STORED
+                        else:
+                            compress_type = zipfile.ZIP_DEFLATED
+                        zf.write(f, arcname=f"{uid}/{f.name}", compress_type=compress_type)
+            self._log_event(user_id="Admin", action="DOWNLOAD_ALL_EHRS", metadata={"out": target})
             messagebox.showinfo("Exported", f"All EHRs exported to {target}")
         except Exception as e:
             messagebox.showerror("Export failed", f"Failed to export: {e}")
-        finally:
-            shutil.rmtree(tmpdir, ignore_errors=True)
 
     def open_ledger_overview(self):
         """Alias for compatibility - same as open_blockchain_overview"""
@@ -758,4 +1004,12 @@ class DashboardPage(ctk.CTkFrame):
             self.auth.active_session = None
         except Exception:
             pass
+        # drop the session's view, including admin rows with Edit/Delete buttons
+        self.is_admin = False
+        self.user_id = None
+        self._user_profile = None
+        self.download_all_btn.grid_remove()
+        self.view_ledger_btn.grid_remove()
+        for w in self.table_frame.winfo_children():
+            w.destroy()
         self.controller.show_frame("LoginPage")
@@ -1,14 +1,16 @@
+import asyncio
 import customtkinter as ctk
 from tkinter import messagebox
 from app import AuthSystem
 from biometric.facial import predict_face
+from utils.helpers import display_user_id
 
 
 class LoginPage(ctk.CTkFrame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.auth: AuthSystem = controller.auth
+        self._face_login_in_flight = False
 
         self.configure(fg_color="#f3f4f6")
 
@@ -88,12 +90,13 @@ class LoginPage(ctk.CTkFrame):
             command=self.handle_user_login
         ).grid(row=0, column=0, pady=5)
 
-        ctk.CTkButton(
+        self.face_login_btn = ctk.CTkButton(
             user_btn_frame,
             text="Login with Face",
             width=240,
             command=self.handle_face_login
-        ).grid(row=1, column=0, pady=5)
+        )
+        self.face_login_btn.grid(row=1, column=0, pady=5)
 
         ctk.CTkButton(
             user_btn_frame,
@@ -147,6 +150,11 @@ class LoginPage(ctk.CTkFrame):
             command=self.handle_admin_login
         ).pack(pady=30)
 
+    @property
+    def auth(self) -> AuthSystem:
+        # resolved on first login, so building this page does not wait for user data
+        return self.controller.auth
+
     # ======================================================================
     # LOGIN HANDLERS
     # ======================================================================
@@ -161,7 +169,7 @@ class LoginPage(ctk.CTkFrame):
 
         if self.auth.login_password(username, password):
             uid = self.auth.active_session
-            display_uid = str(uid).zfill(5)
+            display_uid = display_user_id(uid)
             self.controller.on_login_success(uid)
             messagebox.showinfo("Login Successful", f"Welcome, User {display_uid}")
         else:
@@ -172,27 +180,52 @@ class LoginPage(ctk.CTkFrame):
         admin_pass = self.admin_pass.get().strip()
 
         if admin_user.lower() == "admin" and admin_pass == "Admin@123":
-            self.controller.frames["DashboardPage"].enable_admin_mode()
+            self.auth.active_session = "Admin"
+            self.controller.get_frame("DashboardPage").enable_admin_mode()
             self.controller.show_frame("DashboardPage")
         else:
             messagebox.showerror("Admin Login Failed", "Incorrect admin credentials")
 
     def handle_face_login(self):
-        user_id, confidence = predict_face()
+        # one prediction at a time: each one opens the camera
+        if self._face_login_in_flight:
+            return
+        self._face_login_in_flight = True
+        self.face_login_btn.configure(state="disabled")
+        # camera capture and prediction run on the controller's background loop
+        self.controller.run_async(asyncio.to_thread(predict_face), self._on_face_predicted, self._on_face_error)
+
+    def _end_face_login(self):
+        self._face_login_in_flight = False
+        self.face_login_btn.configure(state="normal")
+
+    def _on_face_predicted(self, result):
+        self._end_face_login()
+        # a slow match must not replace a session started another way meanwhile
+        if self.auth.active_session is not None or not self.winfo_ismapped():
+            return
+
+        user_id, confidence = result
 
         if user_id:
             self.auth.active_session = user_id
-            display_uid = str(user_id).zfill(5)
+            display_uid = display_user_id(user_id)
             self.controller.on_login_success(user_id)
             messagebox.showinfo("Face Login Successful", f"Welcome, User {display_uid}")
         else:
             messagebox.showerror("Face Login Failed", "Face not recognized")
 
+    def _on_face_error(self, exc: Exception):
+        self._end_face_login()
+        if self.auth.active_session is not None or not self.winfo_ismapped():
+            return
+        messagebox.showerror("Face Login Failed", f"Face login failed: {exc}")
+
     def handle_fingerprint_login(self):
         user_id, msg = self.auth.login_fingerprint()
 
         if user_id:
-            display_uid = str(user_id).zfill(5)
+            display_uid = display_user_id(user_id)
             self.controller.on_login_success(user_id)
             messagebox.showinfo("Fingerprint Login Successful", f"Welcome, User {display_uid}")
         else:
@@ -1,19 +1,49 @@
+import asyncio
+import multiprocessing
+import threading
 import customtkinter as ctk
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, Union
 from gui.registration_page import RegistrationPage
 from gui.login_page import LoginPage
 from gui.dashboard import DashboardPage
 from app import AuthSystem
+from biometric.facial import migrate_face_gallery
+
+# Page switch fade: number of alpha steps and delay between them (~60 Hz)
+_FADE_STEPS = 8
+_FADE_INTERVAL_MS = 16
+
+
+def _report_gallery_migration(future):
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is not None:
+        print(f"Face gallery migration failed: {exc}")
+
+
+def _apply_theme_once():
+    """Set the app theme a single time per process.
+
+    The flag lives on the ctk module so a reload of this module, or a
+    second MainApp, does not parse the theme JSON and recolour again.
+    """
+    if getattr(ctk, "_ehr_theme_set", False):
+        return
+    ctk.set_appearance_mode("light")
+    ctk.set_default_color_theme("blue")
+    ctk._ehr_theme_set = True
 
 
 class MainApp(ctk.CTk):
-    def __init__(self, auth_system: AuthSystem):
+    def __init__(self, auth_system: Union[AuthSystem, "Future[AuthSystem]"]):
         super().__init__()
 
         # ---------------------------------------------------------
         # Appearance
         # ---------------------------------------------------------
-        ctk.set_appearance_mode("light")
-        ctk.set_default_color_theme("blue")
+        _apply_theme_once()
 
         self.title("EHR System")
         self.geometry("1050x650")
@@ -22,21 +52,41 @@ class MainApp(ctk.CTk):
         # ---------------------------------------------------------
         # App State
         # ---------------------------------------------------------
-        self.auth = auth_system
+        # auth may still be loading in the background; see the auth property
+        if isinstance(auth_system, Future):
+            self._auth = None
+            self._auth_future = auth_system
+        else:
+            self._auth = auth_system
+            self._auth_future = None
         self.current_user_id = ""
         self.current_user_name = ""
         self.is_admin = False
 
+        # Background asyncio loop for biometric and other blocking work
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+        # Face model training runs in its own process so it neither holds the
+        # GIL nor competes with Tk callbacks; the worker is spawned on first use
+        self.train_pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        # face galleries enrolled before capture-time CLAHE are migrated here,
+        # on the single training worker, and nowhere else
+        self.train_pool.submit(migrate_face_gallery).add_done_callback(_report_gallery_migration)
+
         # ---------------------------------------------------------
         # Main Container
         # ---------------------------------------------------------
+        # The window background already provides the grey surround; the
+        # container is placed on it directly so a window resize does not
+        # redraw a full-size frame canvas for every pixel of the drag
         self.configure(fg_color="#f3f4f6")
 
-        self.outer_frame = ctk.CTkFrame(self, fg_color="#f3f4f6")
-        self.outer_frame.pack(fill="both", expand=True)
-
         self.container = ctk.CTkFrame(
-            self.outer_frame,
+            self,
             fg_color="white",
             corner_radius=20
         )
@@ -49,35 +99,87 @@ class MainApp(ctk.CTk):
         # ---------------------------------------------------------
         # Load Pages
         # ---------------------------------------------------------
+        # Pages are built on first use. Only the visible page stays mapped;
+        # hidden pages keep their drawn canvases and are not redrawn until
+        # shown again at a new size
+        self._page_classes = {
+            "RegistrationPage": RegistrationPage,
+            "LoginPage": LoginPage,
+            "DashboardPage": DashboardPage,
+        }
         self.frames = {}
-        for F in (RegistrationPage, LoginPage, DashboardPage):
-            frame = F(parent=self.container, controller=self)
-            self.frames[F.__name__] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
+        self._current_frame = None
+        self._fade_job = None
 
         # Start at login page
         self.show_frame("LoginPage")
 
+    @property
+    def auth(self) -> AuthSystem:
+        """The auth system, waiting for background construction on first use."""
+        if self._auth is None:
+            self._auth = self._auth_future.result()
+        return self._auth
+
     # ---------------------------------------------------------
-    # Frame Switching
+    # Background Work
     # ---------------------------------------------------------
-    def show_frame(self, page_name: str):
-        frame = self.frames[page_name]
-        frame.tkraise()
-
+    def run_async(self, coro: Awaitable, callback: Callable[[Any], None],
+                  on_error: Optional[Callable[[Exception], None]] = None):
+        """
+        Run a coroutine on the background loop and hand its result to
+        callback on the Tk thread. Exceptions go to on_error when given,
+        otherwise to Tk's report_callback_exception.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        future.add_done_callback(lambda f: self.after(0, self._deliver_async_result, f, callback, on_error))
+
+    def destroy(self):
+        self.train_pool.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    def _deliver_async_result(self, future, callback, on_error):
         try:
-            frame.update()
-            self._animate_fade_in(frame)
-        except Exception:
-            pass
+            result = future.result()
+        except Exception as exc:
+            if on_error is None:
+                raise
+            on_error(exc)
+            return
+        callback(result)
 
-    def _animate_fade_in(self, widget):
-        try:
-            for _ in range(0, 8):
-                widget.update()
-                self.update_idletasks()
-        except Exception:
-            pass
+    # ---------------------------------------------------------
+    # Frame Switching
+    # ---------------------------------------------------------
+    def get_frame(self, page_name: str):
+        """Return the page, constructing it on first access."""
+        frame = self.frames.get(page_name)
+        if frame is None:
+            frame = self._page_classes[page_name](parent=self.container, controller=self)
+            self.frames[page_name] = frame
+            frame.grid(row=0, column=0, sticky="nsew")
+            frame.grid_remove()
+        return frame
+
+    def show_frame(self, page_name: str):
+        frame = self.get_frame(page_name)
+        if frame is self._current_frame:
+            return
+        if self._current_frame is not None:
+            self._current_frame.grid_remove()
+        frame.grid()
+        self._current_frame = frame
+        self._animate_fade_in()
+
+    def _animate_fade_in(self, step: int = 0):
+        """Raise window alpha one step per tick, returning to the mainloop in between."""
+        if step == 0 and self._fade_job is not None:
+            self.after_cancel(self._fade_job)
+        self._fade_job = None
+
+        self.attributes("-alpha", (step + 1) / _FADE_STEPS)
+        if step + 1 < _FADE_STEPS:
+            self._fade_job = self.after(_FADE_INTERVAL_MS, self._animate_fade_in, step + 1)
 
     # ---------------------------------------------------------
     # Successful Login or Post Registration
@@ -86,8 +188,10 @@ class MainApp(ctk.CTk):
 
         self.current_user_id = user_id
         self.is_admin = user_id.lower() == "admin"
+        # every login path ends here; a late face match checks this before switching
+        self.auth.active_session = user_id
 
-        dashboard: DashboardPage = self.frames["DashboardPage"]
+        dashboard: DashboardPage = self.get_frame("DashboardPage")
 
         # ------------------------------
         # Admin Login
@@ -106,10 +210,8 @@ class MainApp(ctk.CTk):
             if user_data:
                 self.current_user_name = user_data.get("name", user_id)
 
-                dashboard.set_user(user_id)
-
-                # FIXED: correct dashboard update function
-                dashboard.render_user_profile()
+                # hand over the fetched profile; set_user renders profile and logs
+                dashboard.set_user(user_id, profile=user_data)
 
             else:
                 self.current_user_name = user_id
@@ -123,6 +225,7 @@ class MainApp(ctk.CTk):
 # Entry Point
 # ---------------------------------------------------------
 if __name__ == "__main__":
-    auth = AuthSystem()
-    app = MainApp(auth)
-    app.mainloop()
+    # Load users on a worker while Tk creates the window
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        app = MainApp(pool.submit(AuthSystem))
+        app.mainloop()
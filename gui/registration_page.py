@@ -1,9 +1,13 @@
+import re
+import queue
+import asyncio
 import customtkinter as ctk
 from tkinter import messagebox, Toplevel
 from datetime import datetime
-from typing import Optional
-from threading import Thread
+from functools import partial
+from typing import List, Optional, Tuple
 from app import AuthSystem
+from gui._auth_form_base import _AuthFormBase
 from biometric.facial import capture_and_save_face_samples, train_lbph_recognizer
 try:
     from biometric import facial as _facial_module  # type: ignore
@@ -12,8 +16,22 @@ except Exception:
     _facial_module = None
     _HAS_STREAM_CAPTURE = False
 
+_EMAIL_RE = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
 
-class RegistrationPage(ctk.CTkFrame):
+# Pose hints shown in the progress modal while samples are captured
+_FACE_CAPTURE_HINTS = (
+    "look straight at the camera",
+    "turn slightly to the left",
+    "turn slightly to the right",
+    "tilt your head up a little",
+    "tilt your head down a little",
+)
+
+# How often progress posted by the capture worker is applied to the modal
+_UI_DRAIN_MS = 50
+
+
+class RegistrationPage(_AuthFormBase):
 
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -25,6 +43,11 @@ class RegistrationPage(ctk.CTkFrame):
         self.current_user_id: Optional[str] = None
         self.biometric_captured = False
         self.biometric_choice = "Face"
+        self._register_in_flight = False
+
+        # ("progress" | "status", value) pairs from the capture worker
+        self._ui_queue: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        self._ui_drain_job = None
 
         # UI
         self.configure(fg_color="#f5f5f5")
@@ -38,39 +61,12 @@ class RegistrationPage(ctk.CTkFrame):
             font=ctk.CTkFont(size=28, weight="bold")
         ).pack(pady=(30, 15))
 
-        form_card = ctk.CTkFrame(self, corner_radius=15, fg_color="white")
-        form_card.pack(padx=40, pady=20, fill="both", expand=False)
-
-        self.name_entry = self._add_entry(form_card, "Full Name")
-        self.dob_entry = self._add_entry(form_card, "DOB (YYYY-MM-DD)")
-
-        self.gender_var = ctk.StringVar(value="Select Gender")
-        self.gender_combo = ctk.CTkComboBox(
-            form_card,
-            values=["Male", "Female", "Other"],
-            variable=self.gender_var,
-            state="readonly"
-        )
-        self.gender_combo.pack(pady=10, padx=20)
-
-        self.email_entry = self._add_entry(form_card, "Email")
-        self.password_entry = self._add_entry(form_card, "Password", show="*")
-
-        self.biometric_var = ctk.StringVar(value="Face")
-        self.biometric_combo = ctk.CTkComboBox(
-            form_card,
-            values=["Face", "Fingerprint"],
-            variable=self.biometric_var,
-            state="readonly"
-        )
-        self.biometric_combo.pack(pady=10, padx=20)
-
+        form_card = self._build_form_card()
         self._add_buttons(form_card)
 
-    def _add_entry(self, parent, placeholder: str, show: Optional[str] = None):
-        entry = ctk.CTkEntry(parent, placeholder_text=placeholder, show=show)
-        entry.pack(pady=10, padx=20)
-        return entry
+        # inline, non-modal validation feedback
+        self.error_label = ctk.CTkLabel(form_card, text="", text_color="#dc2626")
+        self.error_label.pack(pady=(0, 10))
 
     def _add_buttons(self, parent):
         btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -103,6 +99,9 @@ class RegistrationPage(ctk.CTkFrame):
 
     # -------------------- Registration --------------------
     def handle_register(self):
+        if self._register_in_flight:
+            return
+
         name = self.name_entry.get().strip()
         dob = self.dob_entry.get().strip()
         gender = self.gender_var.get()
@@ -111,27 +110,31 @@ class RegistrationPage(ctk.CTkFrame):
         self.biometric_choice = self.biometric_var.get()
 
         # validations
-        if not all([name, dob, gender, email, password]) or gender == "Select Gender":
-            messagebox.showerror("Validation", "All fields are required")
+        if not (name and dob and gender and email and password) or gender == "Select Gender":
+            self.error_label.configure(text="All fields are required")
             return
 
         if not self._validate_dob(dob):
-            messagebox.showerror("Validation", "DOB must be in YYYY-MM-DD format")
+            self.error_label.configure(text="DOB must be in YYYY-MM-DD format")
             return
 
         if not self._validate_email(email):
-            messagebox.showerror("Validation", "Invalid email format")
+            self.error_label.configure(text="Invalid email format")
             return
 
         if not self._validate_password(password):
-            messagebox.showerror(
-                "Validation",
-                "Password must be at least 8 characters long and contain letters and digits"
+            self.error_label.configure(
+                text="Password must be at least 8 characters long and contain letters and digits"
             )
             return
 
-        # register user via auth system
-        user_id = self.auth.register_user(
+        # register user via auth system, off the Tk thread; the button stays
+        # disabled until the result has been handled
+        self._register_in_flight = True
+        self.register_btn.configure(state="disabled")
+        self.error_label.configure(text="")
+        register = partial(
+            self.auth.register_user,
             name=name,
             dob=dob,
             gender=gender,
@@ -139,11 +142,18 @@ class RegistrationPage(ctk.CTkFrame):
             password=password,
             biometric_type=self.biometric_choice
         )
+        self.controller.run_async(asyncio.to_thread(register), self._on_register_done, self._on_register_failed)
+
+    def _on_register_done(self, user_id: Optional[str]):
+        self._register_in_flight = False
+        self.register_btn.configure(state="normal")
 
         if not user_id:
-            messagebox.showerror("Registration Failed", "A user with this email already exists")
+            self.error_label.configure(text="A user with this email already exists")
             return
 
+        self.error_label.configure(text="")
+
         self.current_user_id = user_id
         self.biometric_captured = False
         self.capture_btn.configure(state="normal")
@@ -153,12 +163,19 @@ class RegistrationPage(ctk.CTkFrame):
             f"User created successfully.\nAssigned ID: {user_id}\nProceed with biometric capture."
         )
 
+    def _on_register_failed(self, exc: Exception):
+        self._register_in_flight = False
+        self.register_btn.configure(state="normal")
+        self.error_label.configure(text=f"Registration failed: {exc}")
+
     # -------------------- Biometric Capture --------------------
     def handle_capture(self):
         if self.current_user_id is None:
-            messagebox.showerror("Error", "Please register before capturing biometric data")
+            self.error_label.configure(text="Please register before capturing biometric data")
             return
 
+        self.error_label.configure(text="")
+
         if self.biometric_choice == "Face":
             # start background capture + training thread
             self._start_face_capture_thread()
@@ -167,7 +184,7 @@ class RegistrationPage(ctk.CTkFrame):
             self._capture_fingerprint()
 
     def _start_face_capture_thread(self):
-        """Show progress modal and start background thread that captures and trains face model."""
+        """Show progress modal and start background capture and training of the face model."""
         self.progress_modal = Toplevel(self)
         self.progress_modal.title("Facial Training")
         self.progress_modal.geometry("420x150")
@@ -189,65 +206,112 @@ class RegistrationPage(ctk.CTkFrame):
         self._status_label = ctk.CTkLabel(self.progress_modal, text="Starting capture...")
         self._status_label.pack(pady=(0, 8))
 
-        # run capture and training in background
-        Thread(target=self._capture_and_train_face, daemon=True).start()
+        # run capture and training on the controller's background loop
+        self._ui_drain_job = self.after(_UI_DRAIN_MS, self._drain_ui_queue)
+        self.controller.run_async(self._capture_and_train_face(), self._on_capture_done, self._on_capture_failed)
+
+    async def _capture_and_train_face(self) -> Tuple[int, Optional[bool]]:
+        """Capture samples, then train if any were saved. Widgets are only touched via after()."""
+        sample_paths = await asyncio.to_thread(self._capture_face_samples, 5)
+        trained = None
+        if sample_paths:
+            self._post_status("Training recognizer...")
+            # only the samples just captured are added to the saved model;
+            # training runs in the controller's worker process
+            train = partial(train_lbph_recognizer, new_user_id=self.current_user_id, sample_paths=sample_paths)
+            trained = await asyncio.get_running_loop().run_in_executor(self.controller.train_pool, train)
+        return len(sample_paths), trained
+
+    def _capture_face_samples(self, total_steps: int) -> List[str]:
+        if _HAS_STREAM_CAPTURE and _facial_module is not None:
+            # Use streaming capture generator exposed by newer biometric module.
+            sample_paths = []
+            gen = getattr(_facial_module, "open_camera_and_capture")(self.current_user_id, total_steps)
+            self._post_status(f"Please {_FACE_CAPTURE_HINTS[0]}")
+            for i, path in enumerate(gen):
+                sample_paths.append(path)
+                hint = _FACE_CAPTURE_HINTS[(i + 1) % len(_FACE_CAPTURE_HINTS)]
+                self._post_progress((i + 1) / total_steps)
+                self._post_status(f"Captured {i + 1}/{total_steps} samples - now {hint}")
+            return sample_paths
+
+        # Fallback: one capture session for all samples (single camera open)
+        self._post_status(f"Capturing {total_steps} samples...")
+        _, sample_paths = capture_and_save_face_samples(self.current_user_id, samples=total_steps)
+        self._post_progress(1.0)
+        return sample_paths
+
+    def _post_progress(self, value: float):
+        self._ui_queue.put(("progress", value))
+
+    def _post_status(self, text: str):
+        self._ui_queue.put(("status", text))
+
+    def _drain_ui_queue(self, reschedule: bool = True):
+        """Apply only the newest progress and status posted since the last drain."""
+        self._ui_drain_job = None
+        progress = status = None
+        while True:
+            try:
+                kind, value = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                progress = value
+            else:
+                status = value
+
+        if not self.progress_modal.winfo_exists():
+            return
+        if progress is not None:
+            self.progress_bar.set(progress)
+        if status is not None:
+            self._status_label.configure(text=status)
+        if reschedule:
+            self._ui_drain_job = self.after(_UI_DRAIN_MS, self._drain_ui_queue)
+
+    def _stop_ui_drain(self):
+        if self._ui_drain_job is not None:
+            self.after_cancel(self._ui_drain_job)
+        # flush what the worker posted last before the modal changes or closes
+        self._drain_ui_queue(reschedule=False)
+
+    def _on_capture_done(self, result: Tuple[int, Optional[bool]]):
+        self._stop_ui_drain()
+        saved_samples, trained = result
+        if saved_samples == 0:
+            self.progress_modal.destroy()
+            messagebox.showerror("Error", "Failed to capture facial biometric data")
+            return
+
+        if trained is False:
+            # training failed but capture succeeded
+            self.progress_modal.destroy()
+            self.register_btn.configure(state="normal")
+            self.capture_btn.configure(state="normal")
+            messagebox.showwarning("Partial Success", "Captured samples but training failed.")
+            return
+
+        self.biometric_captured = True
+        self.capture_btn.configure(state="disabled")
+        self.register_btn.configure(state="disabled")
+        # report success in the open progress window rather than a second modal dialog
+        self._status_label.configure(text="Facial biometric samples captured and trained successfully")
+        self.progress_modal.after(1200, self._finish_face_capture)
 
-    def _capture_and_train_face(self):
-        total_steps = 5
-        saved_samples = 0
+    def _finish_face_capture(self):
+        self.progress_modal.destroy()
+        self._auto_login()
 
+    def _on_capture_failed(self, exc: Exception):
+        # ensure progress modal closed and buttons re-enabled
+        self._stop_ui_drain()
         try:
-            if _HAS_STREAM_CAPTURE and _facial_module is not None:
-                # Use streaming capture generator exposed by newer biometric module.
-                gen = getattr(_facial_module, "open_camera_and_capture")(self.current_user_id, total_steps)
-                for i, _ in enumerate(gen):
-                    saved_samples += 1
-                    progress = (i + 1) / total_steps
-                    # update UI from main thread
-                    self.progress_bar.after(0, lambda p=progress: self.progress_bar.set(p))
-                    self._status_label.after(0, lambda s=f"Captured {i + 1}/{total_steps} samples": self._status_label.configure(text=s))
-            else:
-                # Fallback: call capture_and_save_face_samples(samples=1) repeatedly
-                for i in range(total_steps):
-                    saved_count, _ = capture_and_save_face_samples(self.current_user_id, samples=1)
-                    saved_samples += saved_count
-                    progress = (i + 1) / total_steps
-                    self.progress_bar.after(0, lambda p=progress: self.progress_bar.set(p))
-                    self._status_label.after(0, lambda s=f"Captured {i + 1}/{total_steps} samples": self._status_label.configure(text=s))
-
-            # after capture, if any samples saved, train model
-            if saved_samples > 0:
-                self._status_label.after(0, lambda: self._status_label.configure(text="Training recognizer..."))
-                # training can be somewhat heavy; run and then update UI
-                trained = train_lbph_recognizer()
-                if trained is False:
-                    # training failed but capture succeeded
-                    self.progress_modal.after(0, lambda: self.progress_modal.destroy())
-                    self.register_btn.after(0, lambda: self.register_btn.configure(state="normal"))
-                    self.capture_btn.after(0, lambda: self.capture_btn.configure(state="normal"))
-                    messagebox.showwarning("Partial Success", "Captured samples but training failed.")
-                    return
-
-                # mark success on UI thread
-                self.biometric_captured = True
-                self.progress_modal.after(0, lambda: self.progress_modal.destroy())
-                self.capture_btn.after(0, lambda: self.capture_btn.configure(state="disabled"))
-                self.register_btn.after(0, lambda: self.register_btn.configure(state="disabled"))
-                messagebox.showinfo("Success", "Facial biometric samples captured and trained successfully")
-                # auto login on main thread
-                self.after(0, self._auto_login)
-            else:
-                # no samples captured
-                self.progress_modal.after(0, lambda: self.progress_modal.destroy())
-                messagebox.showerror("Error", "Failed to capture facial biometric data")
-        except Exception as exc:
-            # ensure progress modal closed and buttons re-enabled
-            try:
-                self.progress_modal.after(0, lambda: self.progress_modal.destroy())
-            except Exception:
-                pass
-            self.capture_btn.after(0, lambda: self.capture_btn.configure(state="normal"))
-            messagebox.showerror("Error", f"Face capture failed: {exc}")
+            self.progress_modal.destroy()
+        except Exception:
+            pass
+        self.capture_btn.configure(state="normal")
+        messagebox.showerror("Error", f"Face capture failed: {exc}")
 
     def _capture_fingerprint(self):
         try:
@@ -286,9 +350,12 @@ class RegistrationPage(ctk.CTkFrame):
             return False
 
     def _validate_email(self, email: str) -> bool:
-        import re
-        pattern = r"^[\w\.-]+@[\w\.-]+\.\w+$"
-        return re.match(pattern, email) is not None
+        return _EMAIL_RE.match(email) is not None
 
     def _validate_password(self, password: str) -> bool:
-        return len(password) >= 8 and any(c.isdigit() for c in password) and any(c.isalpha() for c in password)
+        # map() over the str methods keeps the scan in C and stops at the first hit
+        return (
+            len(password) >= 8
+            and any(map(str.isdigit, password))
+            and any(map(str.isalpha, password))
+        )
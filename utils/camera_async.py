@@ -0,0 +1,81 @@
+# utils/camera_async.py
+import threading
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class VideoCaptureThreading:
+    """
+    Grabs camera frames on a daemon thread so the driver buffer never fills
+    with stale frames. A frame is only decoded when read() asks for one;
+    every other grabbed frame is dropped without a retrieve().
+    """
+
+    def __init__(self, src=0):
+        self.cap = cv2.VideoCapture(src)
+        self._cond = threading.Condition()
+        self._want = False
+        self._seq = 0
+        self.ret = False
+        self.frame: Optional[np.ndarray] = None
+        self.started = False
+        self._thread: Optional[threading.Thread] = None
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def start(self) -> "VideoCaptureThreading":
+        if self.started:
+            return self
+        self.started = True
+        self._thread = threading.Thread(target=self.update, daemon=True)
+        self._thread.start()
+        return self
+
+    def update(self):
+        # only this thread touches the capture once started, so it also releases it
+        try:
+            while self.started:
+                if not self.cap.grab():
+                    time.sleep(0.01)
+                    continue
+                with self._cond:
+                    if not self._want:
+                        continue
+                ret, frame = self.cap.retrieve()
+                with self._cond:
+                    self.ret, self.frame = ret, frame
+                    self._seq += 1
+                    self._want = False
+                    self._cond.notify_all()
+        finally:
+            self.cap.release()
+            with self._cond:
+                self._cond.notify_all()
+
+    def read(self, timeout: float = 1.0) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Wait for the next decoded frame. Returns (False, None) on timeout or
+        once the reader has stopped.
+        """
+        with self._cond:
+            seq = self._seq
+            self._want = True
+            self._cond.wait_for(lambda: self._seq != seq or not self.started, timeout)
+            if self._seq == seq:
+                return False, None
+            return self.ret, self.frame
+
+    def stop(self, timeout: float = 1.0):
+        if self._thread is None:
+            self.cap.release()
+            return
+        self.started = False
+        with self._cond:
+            self._cond.notify_all()
+        # a thread still blocked in grab() releases the device itself when it returns
+        self._thread.join(timeout=timeout)
+        self._thread = None
@@ -1,10 +1,18 @@
 # utils/helpers.py
+import hashlib
 import json
+import mmap
+import os
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import shutil
 import random
+import stat
+import tempfile
+import threading
 import string
+from typing import BinaryIO, List, Optional, Set
 
 # import for pdf text extraction
 try:
@@ -12,6 +20,24 @@ try:
 except Exception:
     PyPDF2 = None
 
+# optional PDFium bindings, preferred over PyPDF2 for pdf text extraction
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
+# optional Aho-Corasick matcher for EHR keyword scans
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
+
+# optional zstd compression for stored JSON EHRs
+try:
+    import zstandard as zstd
+except Exception:
+    zstd = None
+
 # Paths
 ROOT = Path.cwd()
 DATA_DIR = ROOT / "data"
@@ -22,6 +48,9 @@ LABEL_MAP_FILE = BIOMETRIC_DIR / "label_map.json"
 EHR_DIR = DATA_DIR / "ehr_files"
 BLOCKCHAIN_DIR = DATA_DIR / "blockchain"
 
+# Stored JSON EHRs are written as name.json.zst when zstandard is available
+EHR_COMPRESSED_SUFFIX = ".zst"
+
 # Ensure directories exist
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 BIOMETRIC_DIR.mkdir(parents=True, exist_ok=True)
@@ -29,33 +58,119 @@ EHR_DIR.mkdir(parents=True, exist_ok=True)
 BLOCKCHAIN_DIR.mkdir(parents=True, exist_ok=True)
 
 
+# ------------------- File Writing -------------------
+
+# read once at import: os.umask can only be queried by setting it, which is not thread safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def atomic_write_json(path: Path, obj, indent: Optional[int] = None):
+    """Serialise obj in memory, write it beside path, then swap it in so readers never see a torn file."""
+    atomic_write_bytes(path, json.dumps(obj, indent=indent, ensure_ascii=False).encode("utf-8"))
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write data to a uniquely named sibling of path and os.replace it into place."""
+    # a unique temp name per call, so concurrent writers never share one
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        # mkstemp creates 0600; keep the target's mode, or what open() would have given a new file
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
 # ------------------- User Management -------------------
 
+# IDs already taken, kept in step with users.json by load_users/save_users
+# so generating an ID needs no disk read
+_USED_IDS: Optional[Set[str]] = None
+
+# Unissued five digit IDs in random order, built on first use; popping from
+# the end is O(1) however full the ID space gets
+_FREE_IDS: Optional[List[int]] = None
+
+
+# Last parsed users.json, keyed by (st_mtime_ns, st_size) of the file it came from
+_USERS_CACHE = {"stamp": None, "data": {}}
+
+# Guards the three caches above and users.json writes; save_users runs on the
+# Tk thread and on registration workers. Reentrant: generate_user_id may load
+_USERS_LOCK = threading.RLock()
+
+
+def _users_file_stamp():
+    try:
+        st = USERS_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 def load_users() -> dict:
-    if USERS_FILE.exists():
-        with open(USERS_FILE, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-    return {}
+    """Users keyed by ID. Returns a shallow copy, so callers may add or remove entries freely."""
+    global _USED_IDS
+    with _USERS_LOCK:
+        stamp = _users_file_stamp()
+        if stamp is not None and stamp == _USERS_CACHE["stamp"] and _USED_IDS is not None:
+            return dict(_USERS_CACHE["data"])
+
+        users = {}
+        if stamp is not None:
+            with open(USERS_FILE, "r", encoding="utf-8") as f:
+                try:
+                    users = json.load(f)
+                except json.JSONDecodeError:
+                    users = {}
+        _USERS_CACHE["stamp"] = stamp
+        _USERS_CACHE["data"] = users
+        _USED_IDS = set(users)
+        return dict(users)
 
 
 def save_users(users: dict):
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(users, f, indent=4, ensure_ascii=False)
+    global _USED_IDS
+    with _USERS_LOCK:
+        snapshot = dict(users)
+        atomic_write_json(USERS_FILE, snapshot, indent=4)
+        _USERS_CACHE["stamp"] = _users_file_stamp()
+        _USERS_CACHE["data"] = snapshot
+        _USED_IDS = set(snapshot)
 
 
 def generate_user_id(name: str = "", dob: str = "") -> str:
-    users = load_users()
-    attempts = 0
-    while True:
-        uid = f"{random.randint(0, 99999):05d}"  # zero padded 5 digits
-        if uid not in users:
-            return uid
-        attempts += 1
-        if attempts > 100000:
-            return str(int(datetime.now().timestamp()))[-5:]
+    global _FREE_IDS
+    with _USERS_LOCK:
+        if _USED_IDS is None:
+            load_users()
+        if _FREE_IDS is None:
+            _FREE_IDS = [n for n in range(100000) if f"{n:05d}" not in _USED_IDS]
+            random.shuffle(_FREE_IDS)
+        while _FREE_IDS:
+            uid = f"{_FREE_IDS.pop():05d}"  # zero padded 5 digits
+            # users.json may have been reloaded with IDs taken elsewhere since the pool was built
+            if uid not in _USED_IDS:
+                # reserve it so a second registration before save_users cannot reuse it
+                _USED_IDS.add(uid)
+                return uid
+        return str(int(datetime.now().timestamp()))[-5:]
+
+
+def display_user_id(user_id) -> str:
+    """Zero padded five digit form of a user identifier, for labels and messages."""
+    uid = str(user_id)
+    return f"{int(uid):05d}" if uid.isdigit() else uid
 
 
 def create_user_folder(user_id: str) -> Path:
@@ -69,43 +184,139 @@ def create_user_folder(user_id: str) -> Path:
 
 _EHR_REQUIRED_FIELDS = {"name", "address", "genotype", "bloodgroup"}
 
-def _text_contains_ehr_keywords(text: str) -> bool:
+# One automaton over all keywords: a single pass over the text instead of one search per keyword
+if ahocorasick is not None:
+    _EHR_AC = ahocorasick.Automaton()
+    for _kw in _EHR_REQUIRED_FIELDS:
+        _EHR_AC.add_word(_kw, _kw)
+    _EHR_AC.make_automaton()
+else:
+    _EHR_AC = None
+
+
+# The keywords are ASCII, so text files can be searched as raw lower-cased bytes
+_EHR_KEYWORD_BYTES = tuple(kw.encode("ascii") for kw in _EHR_REQUIRED_FIELDS)
+_TXT_SAMPLE_BYTES = 8192
+
+
+def _collect_ehr_keywords(text: str, seen: set) -> bool:
+    """Add the keywords found in text to seen; True once two distinct ones have been seen."""
+    # lower() stays: mixed case forms such as "BloodGroup" cannot be covered by adding variants
     t = text.lower()
-    found = 0
-    for kw in _EHR_REQUIRED_FIELDS:
-        if kw in t:
-            found += 1
     # require at least two keywords to reduce false positives
-    return found >= 2
+    if _EHR_AC is not None:
+        for _, kw in _EHR_AC.iter(t):
+            seen.add(kw)
+            if len(seen) >= 2:
+                return True
+        return False
+    for kw in _EHR_REQUIRED_FIELDS:
+        if kw not in seen and kw in t:
+            seen.add(kw)
+            if len(seen) >= 2:
+                return True
+    return False
+
+
+def _text_contains_ehr_keywords(text: str) -> bool:
+    return _collect_ehr_keywords(text, set())
+
+
+def _iter_json_strings(obj):
+    """Yield every key and string value in a parsed JSON document."""
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            yield k
+            yield from _iter_json_strings(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _iter_json_strings(v)
+
+
+def _validate_ehr_data(data) -> bool:
+    # Accept if JSON has any of required keys or nested structure containing them
+    if isinstance(data, dict):
+        keys = set(k.lower() for k in data.keys())
+        if _EHR_REQUIRED_FIELDS & keys:
+            return True
+        # check nested keys and string values, without re-serialising the document
+        seen = set()
+        for text in _iter_json_strings(data):
+            if _collect_ehr_keywords(text, seen):
+                return True
+    return False
 
 
 def _validate_json_ehr(path: Path) -> bool:
     try:
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        # Accept if JSON has any of required keys or nested structure containing them
-        if isinstance(data, dict):
-            keys = set(k.lower() for k in data.keys())
-            if _EHR_REQUIRED_FIELDS & keys:
-                return True
-            # check nested fields as values
-            flattened = json.dumps(data).lower()
-            return _text_contains_ehr_keywords(flattened)
-        return False
+        return _validate_ehr_data(data)
     except Exception:
         return False
 
 
 def _validate_txt_ehr(path: Path) -> bool:
     try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read(8192)  # sample first 8kb
-        return _text_contains_ehr_keywords(content)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return False
+            # sample first 8kb straight from the page cache, without decoding it
+            with mmap.mmap(f.fileno(), min(_TXT_SAMPLE_BYTES, size), access=mmap.ACCESS_READ) as mm:
+                sample = mm[:].lower()
+        # require at least two keywords to reduce false positives
+        found = 0
+        for kw in _EHR_KEYWORD_BYTES:
+            if kw in sample:
+                found += 1
+                if found >= 2:
+                    return True
+        return False
     except Exception:
         return False
 
 
+def extract_pdf_text_pdfium(path, max_pages: int) -> Optional[str]:
+    """
+    Text of the first max_pages pages via PDFium, pages separated by blank lines.
+    Returns None when pypdfium2 is missing, the file cannot be opened, or no page yields text.
+    """
+    if pdfium is None:
+        return None
+    try:
+        pdf = pdfium.PdfDocument(str(path))
+    except Exception:
+        return None
+    text = []
+    try:
+        for i in range(min(len(pdf), max_pages)):
+            try:
+                page = pdf.get_page(i)
+            except Exception:
+                continue
+            try:
+                textpage = page.get_textpage()
+                text.append(textpage.get_text_range())
+                textpage.close()
+            except Exception:
+                continue
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+    if not text:
+        return None
+    return "\n\n".join(text)
+
+
 def _validate_pdf_ehr(path: Path) -> bool:
+    if pdfium is not None:
+        # sample up to first three pages
+        text = extract_pdf_text_pdfium(path, max_pages=3)
+        return text is not None and _text_contains_ehr_keywords(text)
     if PyPDF2 is None:  # library not present
         # reject PDF. This avoids silent false positives.
         return False
@@ -142,6 +353,15 @@ def validate_ehr_file(file_path: str) -> bool:
     return False
 
 
+def validate_ehr_files(file_paths: List[str]) -> List[bool]:
+    """validate_ehr_file for several uploads at once, results in input order."""
+    if len(file_paths) <= 1:
+        return [validate_ehr_file(p) for p in file_paths]
+    # file reads and PDF extraction release the GIL, so threads overlap them
+    with ThreadPoolExecutor(max_workers=min(len(file_paths), os.cpu_count() or 1)) as pool:
+        return list(pool.map(validate_ehr_file, file_paths))
+
+
 def save_ehr_for_user(user_id: str, file_path: str) -> str:
     if not validate_ehr_file(file_path):
         raise ValueError("EHR validation failed. The uploaded file does not contain required EHR fields.")
@@ -149,16 +369,76 @@ def save_ehr_for_user(user_id: str, file_path: str) -> str:
     user_folder = EHR_DIR / user_id
     user_folder.mkdir(parents=True, exist_ok=True)
     dest_file = user_folder / Path(file_path).name
+    # an independent copy with a fresh mtime: load_user_ehr orders records by it,
+    # and later edits to the uploaded file must not reach the stored record
     shutil.copy(file_path, dest_file)
     return str(dest_file)
 
 
+def save_ehr_for_user_obj(user_id: str, ehr_obj: dict, filename: str = "") -> str:
+    """Write an already parsed EHR straight into the user's folder."""
+    if not _validate_ehr_data(ehr_obj):
+        raise ValueError("EHR validation failed. The uploaded file does not contain required EHR fields.")
+
+    user_folder = EHR_DIR / user_id
+    user_folder.mkdir(parents=True, exist_ok=True)
+    if not filename:
+        filename = f"ehr_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    data = json.dumps(ehr_obj, indent=2, ensure_ascii=False).encode("utf-8")
+    if zstd is not None:
+        dest_file = user_folder / (filename + EHR_COMPRESSED_SUFFIX)
+        data = zstd.ZstdCompressor(level=3).compress(data)
+    else:
+        dest_file = user_folder / filename
+    with open(dest_file, "wb") as fh:
+        fh.write(data)
+    return str(dest_file)
+
+
+def ehr_suffix(path) -> str:
+    """Lower-case suffix of the stored content, ignoring a compression suffix."""
+    p = Path(path)
+    if p.suffix.lower() == EHR_COMPRESSED_SUFFIX:
+        return Path(p.stem).suffix.lower()
+    return p.suffix.lower()
+
+
+def ehr_export_name(path) -> str:
+    """File name an EHR should have once exported, without the compression suffix."""
+    p = Path(path)
+    return p.stem if p.suffix.lower() == EHR_COMPRESSED_SUFFIX else p.name
+
+
+def open_ehr_file(path) -> BinaryIO:
+    """Open a stored EHR for binary reading, decompressing .zst files on the fly."""
+    p = Path(path)
+    fh = open(p, "rb")
+    if p.suffix.lower() != EHR_COMPRESSED_SUFFIX:
+        return fh
+    if zstd is None:
+        fh.close()
+        raise RuntimeError("zstandard is required to read compressed EHR files")
+    return zstd.ZstdDecompressor().stream_reader(fh, closefd=True)
+
+
+def export_ehr_file(src_path, target_path):
+    """Copy a stored EHR to target_path, decompressing it if needed."""
+    if Path(src_path).suffix.lower() != EHR_COMPRESSED_SUFFIX:
+        shutil.copy(src_path, target_path)
+        return
+    with open_ehr_file(src_path) as src, open(target_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+
 def load_user_ehr(user_id: str) -> list:
     user_folder = EHR_DIR / user_id
     if not user_folder.exists():
         return []
-    # return full paths for convenience
-    return [str(f) for f in sorted(user_folder.iterdir(), key=lambda p: p.stat().st_mtime)]
+    # return full paths for convenience, oldest first
+    with os.scandir(user_folder) as it:
+        entries = [(e.stat().st_mtime, e.path) for e in it if e.is_file()]
+    entries.sort()
+    return [p for _, p in entries]
 
 
 # ------------------- Admin Helper -------------------
@@ -180,22 +460,76 @@ def get_user_fingerprint_path(user_id: str) -> Path:
 # ------------------- Per user blockchain helpers -------------------
 
 def get_user_blockchain_path(user_id: str) -> Path:
-    f = BLOCKCHAIN_DIR / f"{user_id}.json"
+    f = BLOCKCHAIN_DIR / f"{user_id}.jsonl"
     return f
 
 
+def _get_user_chain_head_path(user_id: str) -> Path:
+    # holds "<current_hash> <chain size>" for the newest block so appends need not read the chain
+    return BLOCKCHAIN_DIR / f"{user_id}.head"
+
+
+def _read_chain_head(head_path: Path, path: Path) -> Optional[str]:
+    """Return the cached newest hash, or raise LookupError if the head no longer matches the chain."""
+    try:
+        fields = head_path.read_text(encoding="ascii").split()
+        size = path.stat().st_size
+    except (OSError, ValueError) as exc:
+        raise LookupError(head_path) from exc
+    # a crash between the append and the head write leaves the recorded size behind
+    if len(fields) != 2 or not fields[1].isdigit() or int(fields[1]) != size:
+        raise LookupError(head_path)
+    return fields[0]
+
+
+def _migrate_legacy_chain(user_id: str, path: Path):
+    """Re-emit an old {user_id}.json array as JSON Lines, once."""
+    legacy = BLOCKCHAIN_DIR / f"{user_id}.json"
+    if path.exists() or not legacy.exists():
+        return
+    try:
+        with open(legacy, "r", encoding="utf-8") as fh:
+            chain = json.load(fh)
+    except Exception:
+        chain = []
+    data = b"".join(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in chain)
+    atomic_write_bytes(path, data)
+    legacy.unlink()
+
+
+def _read_last_block(path: Path) -> Optional[dict]:
+    """Parse only the final line of a JSON Lines chain, reading backwards from the end."""
+    with open(path, "rb") as fh:
+        pos = fh.seek(0, os.SEEK_END)
+        buf = b""
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            fh.seek(pos)
+            buf = fh.read(step) + buf
+            lines = buf.rstrip(b"\n").rsplit(b"\n", 1)
+            if len(lines) == 2:
+                break
+    last = buf.rstrip(b"\n").rsplit(b"\n", 1)[-1]
+    if not last.strip():
+        return None
+    try:
+        return json.loads(last)
+    except ValueError:
+        return None
+
+
 def save_blockchain_for_user(user_id: str, event: dict):
     path = get_user_blockchain_path(user_id)
-    chain = []
-    if path.exists():
-        try:
-            with open(path, "r", encoding="utf-8") as fh:
-                chain = json.load(fh)
-        except Exception:
-            chain = []
+    _migrate_legacy_chain(user_id, path)
 
-    # compute previous hash simple
-    prev_hash = chain[-1].get("current_hash") if chain else None
+    # compute previous hash simple; the .jsonl tail is only scanned when the head is missing or stale
+    head_path = _get_user_chain_head_path(user_id)
+    try:
+        prev_hash = _read_chain_head(head_path, path)
+    except LookupError:
+        last = _read_last_block(path) if path.exists() else None
+        prev_hash = last.get("current_hash") if last else None
     event_record = {
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "user_id": user_id,
@@ -204,25 +538,49 @@ def save_blockchain_for_user(user_id: str, event: dict):
         "metadata": event.get("metadata", {}),
         "previous_hash": prev_hash,
         # current hash is a simple content hash for traceability
-        "current_hash": hashlib_sha256_hex(str(event.get("action")) + json.dumps(event.get("metadata", {})) + (prev_hash or ""))
+        "current_hash": hashlib_sha256_hex(str(event.get("action")), json.dumps(event.get("metadata", {})), prev_hash or "")
     }
-    chain.append(event_record)
-    with open(path, "w", encoding="utf-8") as fh:
-        json.dump(chain, fh, indent=2, ensure_ascii=False)
+    # one record per line, appended; earlier blocks are never rewritten
+    with open(path, "ab") as fh:
+        fh.write(json.dumps(event_record, ensure_ascii=False).encode("utf-8") + b"\n")
+        size = fh.tell()
+    atomic_write_bytes(head_path, f"{event_record['current_hash']} {size}".encode("ascii"))
     return event_record
 
 
 def load_blockchain_for_user(user_id: str) -> list:
     path = get_user_blockchain_path(user_id)
+    try:
+        _migrate_legacy_chain(user_id, path)
+    except Exception:
+        # reading must never fail; serve the old array and let the next save retry
+        legacy = BLOCKCHAIN_DIR / f"{user_id}.json"
+        try:
+            with open(legacy, "r", encoding="utf-8") as fh:
+                chain = json.load(fh)
+            return chain if isinstance(chain, list) else []
+        except Exception:
+            return []
     if not path.exists():
         return []
+    chain = []
     try:
         with open(path, "r", encoding="utf-8") as fh:
-            return json.load(fh)
+            for line in fh:
+                if not line.strip():
+                    continue
+                try:
+                    chain.append(json.loads(line))
+                except ValueError:
+                    continue
     except Exception:
         return []
+    return chain
 
 
-def hashlib_sha256_hex(s: str) -> str:
-    import hashlib
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+def hashlib_sha256_hex(*parts: str) -> str:
+    """SHA-256 of the concatenated parts, fed to the hasher one at a time instead of joined first."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+    return h.hexdigest()